@@ -22,6 +22,13 @@
 
 __version__ = '0.9.3'
 
+try:
+    from fakemp import WorkerPool
+except ImportError:
+    from ._fakemp import WorkerPool
+
+from ._cache import *
+from ._checkpoint import *
 from ._continuousperfstats import *
 from ._crossvalidator import *
 from ._discreteperfstats import *
@@ -29,16 +36,20 @@ from ._gridsearcher import *
 from ._logging import *
 from ._nestedcrossvalidator import *
 from ._normalvalue import *
+from ._sampling import *
 from ._selectinggridsearcher import *
 from ._selectingnestedcrossvalidator import *
 
-__all__ = ['PYXVAL_LOGGER']
+__all__ = ['PYXVAL_LOGGER', 'WorkerPool']
+__all__ += _cache.__all__
+__all__ += _checkpoint.__all__
 __all__ += _continuousperfstats.__all__
 __all__ += _crossvalidator.__all__
 __all__ += _discreteperfstats.__all__
 __all__ += _gridsearcher.__all__
 __all__ += _nestedcrossvalidator.__all__
 __all__ += _normalvalue.__all__
+__all__ += _sampling.__all__
 __all__ += _selectinggridsearcher.__all__
 __all__ += _selectingnestedcrossvalidator.__all__
 
@@ -0,0 +1,125 @@
+# pyxval :: (Python CROSS-VALidation) A Python library containing some useful
+# machine learning interfaces and utilities for supervised learning and 
+# prediction (including cross-validation, grid-search, and performance
+# statistics) 
+# 
+# Copyright (C) 2011 N Lance Hepler <nlhepler@gmail.com> 
+# Copyright (C) 2011 Brent Payne <brent.payne@gmail.com> 
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+from __future__ import division, print_function
+
+from math import erf
+
+import numpy as np
+
+
+__all__ = ['bayes']
+
+
+# the length scales (in the unit cube) a Gaussian process is fit with, the likeliest winning
+_LENGTHSCALES = (0.05, 0.1, 0.2, 0.4, 0.8, 1.6)
+_NOISE = 1e-4
+
+_erf = np.vectorize(erf, otypes=[float])
+
+
+def _kernel(a, b, ls):
+    # Matern 5/2, which is rougher (and so less overconfident) than the squared exponential
+    d = np.sqrt(np.maximum(((a[:, None, :] - b[None, :, :]) ** 2).sum(-1), 0.)) / ls
+    return (1. + np.sqrt(5.) * d + 5. / 3. * d ** 2) * np.exp(-np.sqrt(5.) * d)
+
+
+class _GP(object):
+    '''
+    A zero-mean Gaussian process regression of the (standardized) scores y at the points
+    x, the length scale being the one of `_LENGTHSCALES' most likely to have given them.
+    '''
+
+    def __init__(self, x, y):
+        self.x = x
+        self.center, self.scale = y.mean(), y.std() or 1.
+        y = (y - self.center) / self.scale
+        best = None
+        for ls in _LENGTHSCALES:
+            L = np.linalg.cholesky(_kernel(x, x, ls) + _NOISE * np.eye(len(x)))
+            alpha = np.linalg.solve(L.T, np.linalg.solve(L, y))
+            # the log marginal likelihood, less the constant term
+            loglik = -0.5 * y.dot(alpha) - np.log(np.diag(L)).sum()
+            if best is None or loglik > best:
+                best, self.ls, self.L, self.alpha = loglik, ls, L, alpha
+
+    def predict(self, x):
+        k = _kernel(x, self.x, self.ls)
+        v = np.linalg.solve(self.L, k.T)
+        var = np.maximum(1. - (v ** 2).sum(0), 1e-12)
+        return self.center + self.scale * k.dot(self.alpha), self.scale * np.sqrt(var)
+
+
+def _improvement(mu, sd, best, xi=0.01):
+    # the expected improvement over the best score so far
+    z = (mu - best - xi) / sd
+    cdf = 0.5 * (1. + _erf(z / np.sqrt(2.)))
+    pdf = np.exp(-0.5 * z ** 2) / np.sqrt(2. * np.pi)
+    return (mu - best - xi) * cdf + sd * pdf
+
+
+def _batch(coords, seen, size):
+    # the `size' unseen points of greatest expected improvement, each chosen believing
+    # that those chosen before it score what the process predicts (the kriging believer)
+    units = list(seen)
+    x, y = coords[units], np.array([seen[i] for i in units], dtype=float)
+    unseen = np.ones(len(coords), dtype=bool)
+    unseen[units] = False
+    batch = []
+    for _ in range(size):
+        gp = _GP(x, y)
+        candidates = np.flatnonzero(unseen)
+        mu, sd = gp.predict(coords[candidates])
+        k = int(np.argmax(_improvement(mu, sd, y.max())))
+        i = int(candidates[k])
+        batch.append(i)
+        unseen[i] = False
+        x, y = np.vstack((x, coords[i])), np.append(y, mu[k])
+    return sorted(batch)
+
+
+def _scores(results):
+    # failed combinations count as no better than the worst that didn't fail
+    scores = dict((i, r.stats.get(r.stats.optstat)) for i, r in results if not r.failed)
+    scores = dict((i, float(getattr(s, 'mu', s))) for i, s in scores.items())
+    worst = min(scores.values()) if scores else 0.
+    return dict((i, scores.get(i, worst)) for i, _ in results)
+
+
+def bayes(coords, evaluations, batch, budget, rng):
+    '''
+    Bayesian optimization over the combinations at `coords' (points of the unit cube),
+    validating `evaluations' of them in batches of `batch' on the given `budget': the
+    first batch at random, and every other one where a Gaussian process fit to the
+    scores so far expects the greatest improvement.  Yields and is sent the same as
+    the successive halving of :py:class:`GridSearcher`.
+    '''
+    n, d = coords.shape
+    evaluations = min(evaluations, n)
+    seen = {}
+    units = sorted(rng.choice(n, min(evaluations, max(batch, d + 1)), replace=False).tolist())
+    while True:
+        results = yield units, budget
+        seen.update(_scores(results))
+        if len(seen) >= evaluations:
+            return
+        units = _batch(coords, seen, min(batch, evaluations - len(seen)))
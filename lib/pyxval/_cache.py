@@ -0,0 +1,172 @@
+# pyxval :: (Python CROSS-VALidation) A Python library containing some useful
+# machine learning interfaces and utilities for supervised learning and 
+# prediction (including cross-validation, grid-search, and performance
+# statistics) 
+# 
+# Copyright (C) 2011 N Lance Hepler <nlhepler@gmail.com> 
+# Copyright (C) 2011 Brent Payne <brent.payne@gmail.com> 
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+from __future__ import division, print_function
+
+import logging
+import os
+import pickle
+import sqlite3
+
+from hashlib import sha1
+from numbers import Number
+from threading import Lock
+from types import CodeType, FunctionType
+
+import numpy as np
+
+from ._logging import PYXVAL_LOGGER
+from ._shareddata import MappedArray, fingerprint, issparse
+
+
+__all__ = ['ResultCache']
+
+
+# bumped whenever what a key covers, or how results are stored, changes
+_VERSION = 2
+
+
+def datakey(a):
+    '''
+    Returns a digest identifying the contents of x or y: ndarrays and sparse matrices by
+    their data, arrays in files by their location, size and modification time (rather
+    than reading all of them), and anything else by its pickle.
+    '''
+    if isinstance(a, MappedArray):
+        st = os.stat(a.filename)
+        return repr((a.filename, st.st_size, st.st_mtime_ns, a.dtype.str, a.shape, a.offset, a.order))
+    if issparse is not None and issparse(a):
+        a = a.tocsr()
+        return repr((a.shape,) + tuple(fingerprint(v) for v in (a.data, a.indices, a.indptr)))
+    if isinstance(a, np.ndarray) and not a.dtype.hasobject:
+        return fingerprint(a)
+    return sha1(pickle.dumps(a, protocol=2)).hexdigest()
+
+
+def classkey(cls):
+    # a proxy stands for the class it wraps and the names of the methods it calls
+    args = getattr(cls, '_reduce_args', (cls,))
+    return ('%s.%s' % (args[0].__module__, args[0].__name__),) + tuple(repr(v) for v in args[1:])
+
+
+def _codekey(code):
+    # the bytecode and everything it refers to, including that of the functions defined within it
+    return (code.co_code, code.co_names, tuple(_codekey(c) if isinstance(c, CodeType) else c for c in code.co_consts))
+
+
+def funckey(f, strict=True):
+    '''
+    Returns a key identifying the function f by its name, its code, its defaults and the
+    values it closes over, as lambdas (and functions nested in the same one) share a name.
+    Raises ValueError if some of those don't pickle, unless not `strict', when the key is
+    made of its name alone.
+    '''
+    if f is None or isinstance(f, str):
+        return f
+    name = '%s.%s' % (f.__module__, getattr(f, '__qualname__', f.__name__))
+    code = getattr(f, '__code__', None)
+    try:
+        if code is None:
+            raise TypeError('%s has no code' % name)
+        cells = tuple(c.cell_contents for c in f.__closure__ or ())
+        state = pickle.dumps((_codekey(code), f.__defaults__, f.__kwdefaults__, cells), protocol=2)
+    except Exception as e:
+        if strict:
+            raise ValueError('cannot tell %s apart from other functions: %s' % (name, repr(e)))
+        return name
+    return '%s:%s' % (name, sha1(state).hexdigest())
+
+
+def valuekey(v, strict=True):
+    '''
+    Returns a key identifying the value v, such as a classifier kwarg: arrays by their data
+    (whose repr() elides all but a few elements), functions by :py:func:`funckey`, dicts,
+    lists and tuples by their contents, numbers and strings by their repr(), and anything
+    else by its pickle.
+    '''
+    if isinstance(v, dict):
+        return ('dict',) + tuple(sorted((repr(k), valuekey(x, strict)) for k, x in v.items()))
+    if isinstance(v, (list, tuple)):
+        return (type(v).__name__,) + tuple(valuekey(x, strict) for x in v)
+    if isinstance(v, np.ndarray) or issparse is not None and issparse(v):
+        return ('array', datakey(v))
+    if isinstance(v, FunctionType):
+        return ('function', funckey(v, strict))
+    if v is None or isinstance(v, (Number, str, bytes, np.generic)):
+        return repr(v)
+    try:
+        return ('pickle', sha1(pickle.dumps(v, protocol=2)).hexdigest())
+    except Exception:
+        return repr(v)
+
+
+class ResultCache(object):
+    '''
+    A persistent store of :py:class:`ValidationResult` objects, kept in the sqlite database
+    at `path', which any number of processes may share.  Results are keyed by a digest of
+    everything that determines them (see the `cache' of :py:class:`CrossValidator`), so
+    repeating or extending a search only validates what hasn't been validated before.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.__db = None
+        self.__pid = None
+        self.__lock = Lock()
+
+    @staticmethod
+    def key(*parts):
+        return sha1(repr((_VERSION,) + parts).encode('utf-8')).hexdigest()
+
+    def __connect(self):
+        # connections mustn't cross a fork
+        if self.__db is None or self.__pid != os.getpid():
+            self.__db = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+            self.__db.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result BLOB)')
+            self.__pid = os.getpid()
+        return self.__db
+
+    def get(self, key):
+        '''
+        Returns the result stored under `key', or None.
+        '''
+        with self.__lock:
+            row = self.__connect().execute('SELECT result FROM results WHERE key = ?', (key,)).fetchone()
+        return pickle.loads(row[0]) if row is not None else None
+
+    def put(self, key, result):
+        '''
+        Stores `result' under `key', unless it can't be pickled.
+        '''
+        try:
+            blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            logging.getLogger(PYXVAL_LOGGER).debug('not caching an unpicklable result: %s' % repr(e))
+            return
+        with self.__lock:
+            self.__connect().execute('INSERT OR REPLACE INTO results VALUES (?, ?)', (key, sqlite3.Binary(blob)))
+
+    def __reduce__(self):
+        return ResultCache, (self.path,)
+
+    def __repr__(self):
+        return 'ResultCache(%r)' % self.path
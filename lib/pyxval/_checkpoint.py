@@ -0,0 +1,202 @@
+# pyxval :: (Python CROSS-VALidation) A Python library containing some useful
+# machine learning interfaces and utilities for supervised learning and 
+# prediction (including cross-validation, grid-search, and performance
+# statistics) 
+# 
+# Copyright (C) 2011 N Lance Hepler <nlhepler@gmail.com> 
+# Copyright (C) 2011 Brent Payne <brent.payne@gmail.com> 
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+from __future__ import division, print_function
+
+import logging
+import os
+import pickle
+
+from time import time
+
+try:
+    from fakemp import ifarmout
+except ImportError:
+    from ._fakemp import ifarmout
+
+from ._logging import PYXVAL_LOGGER
+
+
+__all__ = ['Checkpoint']
+
+
+# the log is only folded into the snapshot once it has grown past this many bytes, and past the snapshot
+_COMPACT = 1 << 20
+
+
+class Checkpoint(object):
+    '''
+    The progress of a long validation or grid search, saved to the local file `path' at
+    least every `interval' seconds, and whenever a batch of tasks finishes or fails, so
+    that a run lost to a crash can be resumed where it left off (see the `resume'
+    argument of :py:meth:`CrossValidator.validate` and :py:meth:`GridSearcher.gridsearch`).
+    It holds the results of every finished task along with the partitions and random
+    states they were drawn from, so a resumed run gives exactly the same results.
+    Each save only appends what changed since the last to the log `path'.log, which is
+    folded into the snapshot at `path' once it outgrows it.
+    '''
+
+    def __init__(self, path, interval=60):
+        self.path = path
+        self.interval = interval
+        self.__data = {'signature': None, 'state': {}, 'results': {}}
+        self.__pending = []
+        self.__snapshot, self.__logged = 0, 0
+        if os.path.exists(path):
+            with open(path, 'rb') as fh:
+                self.__data = pickle.load(fh)
+            self.__snapshot = os.path.getsize(path)
+        if os.path.exists(self.__log()):
+            self.__logged = self.__replay()
+        if self.__snapshot or self.__logged:
+            logging.getLogger(PYXVAL_LOGGER).debug('resuming from %s (%d tasks finished)' % (path, sum(len(v) for v in self.__data['results'].values())))
+        self.__saved = time()
+
+    def __log(self):
+        return self.path + '.log'
+
+    def __replay(self):
+        # returns how much of the log holds whole entries, the rest having been cut short by a crash
+        with open(self.__log(), 'rb') as fh:
+            good = 0
+            while True:
+                try:
+                    entry = pickle.load(fh)
+                except (EOFError, pickle.UnpicklingError, ValueError, AttributeError, ImportError, IndexError):
+                    return good
+                self.__apply(entry)
+                good = fh.tell()
+
+    def __apply(self, entry):
+        kind, key, value = entry
+        if kind == 'signature':
+            self.__data['signature'] = value
+        elif kind == 'state':
+            self.__data['state'][key] = value
+        else:
+            section, t = key
+            self.__data['results'].setdefault(section, {})[t] = value
+
+    def check(self, signature):
+        '''
+        Ties the checkpoint to the validation identified by `signature', refusing to resume another.
+        '''
+        if self.__data['signature'] is None:
+            self.__data['signature'] = signature
+            self.__pending.append(('signature', None, signature))
+        elif self.__data['signature'] != signature:
+            raise ValueError('the checkpoint at %s belongs to a different validation' % self.path)
+
+    def state(self, name, make):
+        '''
+        Returns the state saved under `name', making (and saving) it with make() the first time.
+        '''
+        if name not in self.__data['state']:
+            self.__data['state'][name] = make()
+            self.__pending.append(('state', name, self.__data['state'][name]))
+        return self.__data['state'][name]
+
+    def results(self, section):
+        '''
+        The finished tasks of a section, a dictionary from task to result.
+        '''
+        return self.__data['results'].setdefault(section, {})
+
+    def record(self, section, t, r):
+        self.results(section)[t] = r
+        self.__pending.append(('result', (section, t), r))
+        if time() - self.__saved >= self.interval:
+            self.save()
+
+    def save(self):
+        if self.__logged > max(self.__snapshot, _COMPACT):
+            self.compact()
+        elif len(self.__pending):
+            with open(self.__log(), 'ab') as fh:
+                # anything after the last whole entry was cut short by a crash
+                fh.truncate(self.__logged)
+                for entry in self.__pending:
+                    pickle.dump(entry, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                fh.flush()
+                os.fsync(fh.fileno())
+                self.__logged = fh.tell()
+        self.__pending = []
+        self.__saved = time()
+
+    def compact(self):
+        '''
+        Rewrites the whole checkpoint into its snapshot and empties the log.
+        '''
+        # never leave a half-written checkpoint behind, a log left over from a crash
+        # in between only holds entries the snapshot already has
+        tmp = '%s.%d.tmp' % (self.path, os.getpid())
+        with open(tmp, 'wb') as fh:
+            pickle.dump(self.__data, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+        if os.path.exists(self.__log()):
+            os.remove(self.__log())
+        self.__snapshot, self.__logged = os.path.getsize(self.path), 0
+        self.__pending = []
+        self.__saved = time()
+
+
+def checkpoint(resume):
+    # resume is either a Checkpoint, or the path of one
+    return Checkpoint(resume) if isinstance(resume, str) else resume
+
+
+def iresumed(checkpoint, section, farmargs):
+    '''
+    Like ifarmout(**farmargs), except that the tasks finished in the given `section' of
+    the `checkpoint' are yielded straight from it, the rest being farmed out and recorded
+    as they finish.  Without a checkpoint, this is just ifarmout.
+    '''
+    if checkpoint is None:
+        for t, r in ifarmout(**farmargs):
+            yield t, r
+        return
+
+    # the number of tasks is part of the section, as it may depend on the number of workers
+    section = (section, farmargs['num'])
+    done = checkpoint.results(section)
+    for t in sorted(done):
+        yield t, done[t]
+
+    setup, isresult = farmargs['setup'], farmargs['isresult']
+    remaining = [t for t in range(farmargs['num']) if t not in done]
+    try:
+        for k, r in ifarmout(**dict(farmargs, num=len(remaining), setup=lambda k: setup(remaining[k]))):
+            if isresult(r):
+                checkpoint.record(section, remaining[k], r)
+            yield remaining[k], r
+    finally:
+        checkpoint.save()
+
+
+def resumed(checkpoint, section, farmargs):
+    '''
+    Like farmout(**farmargs), see :py:func:`iresumed`.
+    '''
+    results = [None] * farmargs['num']
+    for t, r in iresumed(checkpoint, section, farmargs):
+        results[t] = r
+    return results
@@ -22,23 +22,26 @@
 
 from __future__ import division, print_function
 
-import logging, sys, types
+import logging, sys, threading, types
 
 from copy import deepcopy
 from itertools import chain
-from math import floor
-from random import shuffle, random
+from multiprocessing import cpu_count
 
 import numpy as np
 
 try:
-    from fakemp import farmout, farmworker
+    from fakemp import afarmout, farmout, farmworker, ifarmout
 except ImportError:
-    from ._fakemp import farmout, farmworker
+    from ._fakemp import afarmout, farmout, farmworker, ifarmout
 
+from ._cache import ResultCache, classkey, datakey, funckey, valuekey
+from ._checkpoint import checkpoint as _checkpoint, resumed
 from ._discreteperfstats import DiscretePerfStats
 from ._logging import PYXVAL_LOGGER
+from ._partition import partition as _partition
 from ._proxyclassifierfactory import ProxyClassifierFactory, is_proxy
+from ._shareddata import attach, fingerprint, gather, issparse, mapped, release, share
 from ._validator import Validator
 from ._validationresult import ValidationResult
 
@@ -46,25 +49,181 @@ from ._validationresult import ValidationResult
 __all__ = ['CrossValidator']
 
 
-def _folder(f, partition, x, y, classifier, extra):
-    nrow = len(x)
+def _isfold(r):
+    return isinstance(r, tuple) and len(r) == 5
+
+
+def _isfolds(r):
+    return isinstance(r, list) and all(_isfold(f) for f in r)
+
+
+def _unnest(results):
+    # tasks that return several folds at once
+    for r in results:
+        if _isfolds(r):
+            for f in r:
+                yield f
+        else:
+            yield r
+
+
+class _Rows(object):
+    '''
+    A lazy, read-only view of the rows `index' of the list-like or memory-mapped `data',
+    so that a fold holds only the indices of its rows until they're asked for.
+    '''
+
+    def __init__(self, data, index):
+        self.data = data
+        self.index = index
+
+    def __len__(self):
+        return len(attach(self.index))
+
+    def __getitem__(self, i):
+        index = attach(self.index)
+        if isinstance(i, slice):
+            return _Rows(self.data, index[i])
+        return attach(self.data)[index[i]]
+
+    def __iter__(self):
+        data = attach(self.data)
+        for i in attach(self.index).tolist():
+            yield data[i]
+
+    def __add__(self, other):
+        assert(other.data is self.data)
+        return _Rows(self.data, np.concatenate((attach(self.index), attach(other.index))))
+
+    def __array__(self, dtype=None, copy=None):
+        data = attach(self.data)
+        if isinstance(data, np.ndarray):
+            return np.asarray(gather(data, attach(self.index)), dtype=dtype)
+        return np.asarray(list(self), dtype=dtype)
+
+
+# the training set buffers of each thread, keyed by slot
+_buffers = threading.local()
+
+# the largest buffer (in bytes) kept for the next fold, so that a persistent worker
+# doesn't hold on to the training set of a big validation long after it's done
+_MAXBUFFER = 1 << 26
+
+
+def _buffer(slot, rows, like):
+    # reuse the buffer of the last fold whenever it's big enough, the folds of a
+    # partition only ever differ in size by a single row
+    buffers = _buffers.__dict__
+    buf = buffers.pop(slot, None)
+    if buf is None or buf.shape[0] < rows or buf.shape[1:] != like.shape[1:] or buf.dtype != like.dtype:
+        buf = np.empty((rows,) + like.shape[1:], dtype=like.dtype)
+    if buf.nbytes <= _MAXBUFFER:
+        buffers[slot] = buf
+    return buf[:rows]
+
+
+def _held(a):
+    # the held-out rows go back with the predictions, so a lazy view is made into
+    # rows of its own rather than pickling the whole of the data it views
+    if isinstance(a, _Rows):
+        return np.asarray(a) if isinstance(attach(a.data), np.ndarray) else list(a)
+    return a
+
+
+def _sparse(a):
+    return issparse is not None and issparse(a)
+
+
+def _rows(a):
+    # sparse matrices are sliced by row, which CSR does natively and cheaply, and arrays
+    # in files are left there for every worker to map and read only the rows it needs
+    return a.tocsr() if _sparse(a) else mapped(a)
+
+
+def _nrows(a):
+    # the length of a sparse matrix is ambiguous
+    return a.shape[0] if _sparse(a) else len(a)
+
+
+def _indexable(a):
+    return isinstance(a, np.ndarray) or _sparse(a)
+
+
+def _arrange(partition, *arrays):
+    # put the rows of every array in fold order, in-memory arrays by copying them once and
+    # anything else (lists and arrays in files) lazily, returning the partition of the arranged rows first
+    order = attach(partition.order)
+    arranged = [a[order] if _indexable(a) else _Rows(a, partition.order) for a in arrays]
+    return [partition.arranged()] + arranged
+
+
+def _slices(slot, f, partition, a):
+    # with the rows in fold order, the held-out fold is a view and the rest are
+    # copied into a buffer which is reused from fold to fold
+    begin, lo, hi = partition.offsets[1], partition.offsets[f + 1], partition.offsets[f + 2]
+    if _sparse(a):
+        return a[np.r_[begin:lo, hi:a.shape[0]]], a[lo:hi]
+    head, tail = a[begin:lo], a[hi:]
+    if not isinstance(a, np.ndarray):
+        return head + tail, a[lo:hi]
+    ain = _buffer(slot, len(head) + len(tail), a)
+    np.concatenate((head, tail), out=ain)
+    return ain, a[lo:hi]
 
-    inpart = [i for i in range(nrow) if partition[i] != f]
-    outpart = [i for i in range(nrow) if partition[i] == f]
 
-    if isinstance(x, np.ndarray):
-        xin = x[inpart, :]
-        xout = x[outpart, :]
-    else:
-        xin = [x[i] for i in inpart]
-        xout = [x[i] for i in outpart]
+def _split(f, partition, x, y):
+    if partition.order is None:
+        xin, xout = _slices('x', f, partition, x)
+        yin, yout = _slices('y', f, partition, y)
+        return xin, yin, xout, yout
 
-    if isinstance(y, np.ndarray):
-        yin = y[inpart, :]
-        yout = y[outpart, :]
-    else:
-        yin = [y[i] for i in inpart]
-        yout = [y[i] for i in outpart]
+    inpart = partition.inpart(f)
+    outpart = partition.outpart(f)
+
+    return _take(x, inpart), _take(y, inpart), _take(x, outpart), _take(y, outpart)
+
+
+def _take(a, index):
+    if isinstance(a, np.ndarray):
+        return gather(a, index)
+    elif _sparse(a):
+        return a[index]
+    return [a[i] for i in index.tolist()]
+
+
+def _block(f, partition, a):
+    # the rows of fold f alone, a view when the rows are in fold order
+    if partition.order is None:
+        return a[partition.offsets[f + 1]:partition.offsets[f + 2]]
+    return _take(a, partition.outpart(f))
+
+
+def _checkextra(extra, classifier_cls):
+    if extra is not None:
+        if not isinstance(extra, str) and \
+           not isinstance(extra, types.MethodType) and \
+           not isinstance(extra, types.FunctionType):
+            raise ValueError('the `extra\' argument takes either a string or a method.')
+
+    if isinstance(extra, types.MethodType):
+        extra = extra.__name__
+        assert(hasattr(classifier_cls, extra))
+
+    return extra
+
+
+def _extra(classifier, extra):
+    if extra is None:
+        return None
+    elif isinstance(extra, str):
+        return getattr(classifier, extra)()
+    elif isinstance(extra, types.FunctionType):
+        return extra(classifier)
+    return None
+
+
+def _folder(f, partition, x, y, classifier, extra):
+    xin, yin, xout, yout = _split(f, partition, attach(x), attach(y))
 
     # print 'in:', xin.shape[0], 'out:', xout.shape[0], 'kwargs:', kwargs
 
@@ -77,17 +236,97 @@ def _folder(f, partition, x, y, classifier, extra):
     preds = classifier.predict(xout)
 
     # do this after both learning and prediction just in case either performs some necessary computation
-    xtra = None
-    if extra is not None:
-        if isinstance(extra, str):
-            xtra = apply(getattr(classifier, extra),)
-        elif isinstance(extra, types.FunctionType):
-            xtra = extra(classifier)
-    return l, xtra, yout, preds, classifier.weights()
+    return l, _extra(classifier, extra), _held(yout), preds, classifier.weights()
+
+
+def _chainer(f, partition, x, y, classifiers, extra):
+    xin, yin, xout, yout = _split(f, partition, attach(x), attach(y))
+    yout = _held(yout)
+
+    # every classifier of the chain starts from the fit of the one before it
+    results = []
+    previous = None
+    for classifier in classifiers:
+        if previous is not None:
+            classifier.warm(previous)
+        l = classifier.learn(xin, yin)
+        preds = classifier.predict(xout)
+        results.append((l, _extra(classifier, extra), yout, preds, classifier.weights()))
+        previous = classifier
+
+    return results
+
+
+def _update(classifier, x, y):
+    # the incremental update of the classifier, under whatever name it was asked for
+    return getattr(classifier, classifier._update_func)(x, y)
+
+
+def _subtree(lo, hi, partition, x, y, classifier, l, extra, results):
+    # the classifier has learnt every fold outside lo..hi, so it can predict fold lo
+    # once only one is left, otherwise each half learns the other half and recurses,
+    # l being what the last update of the classifier returned, which stands in for learn()'s
+    if hi - lo == 1:
+        xout, yout = _block(lo, partition, x), _block(lo, partition, y)
+        preds = classifier.predict(xout)
+        results.append((l, _extra(classifier, extra), _held(yout), preds, classifier.weights()))
+        return
+
+    mid = (lo + hi) // 2
+
+    left, ll = deepcopy(classifier), l
+    for f in range(mid, hi):
+        ll = _update(left, _block(f, partition, x), _block(f, partition, y))
+    _subtree(lo, mid, partition, x, y, left, ll, extra, results)
+    del left
+
+    # the right half may as well have the original rather than another copy
+    for f in range(lo, mid):
+        l = _update(classifier, _block(f, partition, x), _block(f, partition, y))
+    _subtree(mid, hi, partition, x, y, classifier, l, extra, results)
+
+
+def _treer(lo, hi, partition, x, y, classifier, extra):
+    x, y = attach(x), attach(y)
+
+    # learn every fold outside of this task's subtree, then divide and conquer within it
+    l = None
+    for f in chain(range(lo), range(hi, partition.folds)):
+        l = _update(classifier, _block(f, partition, x), _block(f, partition, y))
+
+    results = []
+    _subtree(lo, hi, partition, x, y, classifier, l, extra, results)
+    return results
+
+
+def _looer(x, y, classifier, extra):
+    x, y = attach(x), attach(y)
+
+    # a single fit gives the prediction of every row from a model trained without it
+    preds = classifier.loo(x, y)
+
+    return None, _extra(classifier, extra), y, preds, classifier.weights()
 
 
 # implement cross-validation interface here, grid-search optional
 class CrossValidator(Validator):
+    '''
+    Validates a classifier by k-fold cross-validation.
+    :param seed: seeds the random partition into folds, see :py:func:`numpy.random.default_rng`
+    :param loo_func: the classifier's exact leave-one-out method, see :py:class:`ProxyClassifierFactory`, with which
+        validating with as many folds as rows takes a single fit, all of its predictions being scored as one fold
+    :param update_func: the classifier's incremental update method, see :py:class:`ProxyClassifierFactory`, with
+        which the folds are validated by sharing partial models in a divide-and-conquer tree, with O(n log k) updates
+        rather than the O(n k) rows learnt by k separate fits, which is only exact for learners whose updates commute,
+        and so is only done when asked for, each fold's learn result being what its model's last update returned
+    :param contiguous: put the rows of x and y in fold order once, so that every held-out fold is a view
+        and every training set is copied into a buffer reused by the next fold (so the classifier must not
+        keep hold of its training data after predicting), lists and arrays in files being viewed lazily instead,
+        and buffers of more than 64MB being dropped once their fold is done
+    :param cache: a :py:class:`ResultCache`, or the path of one, that results are looked up in before being
+        computed and stored in after, keyed by the classifier, its kwargs, the folds and seed, the scorer and
+        the data, which requires a `seed' so that the same folds come about every time
+    '''
 
     def __init__(self,
             classifier_cls,
@@ -97,14 +336,26 @@ class CrossValidator(Validator):
             scorer_kwargs={},
             learn_func=None,
             predict_func=None,
-            weights_func=None):
+            weights_func=None,
+            pool=None,
+            timeout=None,
+            chunksize=None,
+            seed=None,
+            contiguous=False,
+            loo_func=None,
+            warm_func=None,
+            update_func=None,
+            cache=None):
 
         if not is_proxy(classifier_cls):
             classifier_cls = ProxyClassifierFactory(
                     classifier_cls,
                     learn_func,
                     predict_func,
-                    weights_func
+                    weights_func,
+                    loo_func,
+                    warm_func,
+                    update_func
             ).generate()
 
         self.classifier_cls = classifier_cls
@@ -112,57 +363,132 @@ class CrossValidator(Validator):
         self.classifier_kwargs = classifier_kwargs
         self.scorer_cls = scorer_cls
         self.scorer_kwargs = scorer_kwargs
-
-    @staticmethod
-    def __partition(l, folds):
-        npf = int(l / folds) # num per fold
-        r = l % folds
-        p = list(chain(*([i] * npf for i in range(folds)))) + list(range(r))
-        shuffle(p, random=random)
-        assert(len(p) == l)
-        return p
+        self.pool = pool
+        self.timeout = timeout
+        self.chunksize = chunksize
+        self.seed = seed
+        self.contiguous = contiguous
+        self.cache = ResultCache(cache) if isinstance(cache, str) else cache
 
     def crossvalidate(self, x, y, classifier_kwargs={}, extra=None, parallel=True):
         return CrossValidator.validate(self, x, y, classifier_kwargs, extra, parallel)
 
-    def validate(self, x, y, classifier_kwargs={}, extra=None, parallel=True):
+    def _fastloo(self, x):
         '''
-        Runs crossvalidation on the provided data.  The length of the :py:obj:`x` array should be identical to :py:obj:`y`
-        and will be used to partition the lists by index.
-        :param x: observations, needs to implement __len__ and __getitem__ aka len(x), x[i]
-        :param y: expected output, needs to implement __getitem__, aka y[i]
-        :param classifier_kwargs: a dictionary of parameters to pass to the classifier
-        :param extra: @todo extra information to pull out of the classifier
-        :returns: @todo figure this out
+        Whether validating x is leave-one-out, and the classifier can do it in a single fit.
         '''
-        if extra is not None:
-            if not isinstance(extra, str) and \
-               not isinstance(extra, types.MethodType) and \
-               not isinstance(extra, types.FunctionType):
-                raise ValueError('the `extra\' argument takes either a string or a method.')
+        return getattr(self.classifier_cls, 'loo', None) is not None and self.folds >= _nrows(_rows(x))
 
-        if isinstance(extra, types.MethodType):
-            extra = extra.__name__
-            assert(hasattr(self.classifier_cls, extra))
+    def _incremental(self):
+        '''
+        Whether the classifier learns incrementally, and so the folds can be validated as a tree.
+        '''
+        return getattr(self.classifier_cls, '_update_func', None) is not None
 
-        log = logging.getLogger(PYXVAL_LOGGER)
-        log.debug('beginning %d-fold crossvalidation' % self.folds)
+    def _digest(self, x, y, rows=None):
+        '''
+        Returns a tuple identifying the data, x and y (or their `rows' alone), and the settings
+        of this validator, which together with the classifier kwargs determine its results.
+        '''
+        x = _rows(x)
+        return (
+            datakey(x),
+            datakey(_rows(y)),
+            None if rows is None else fingerprint(np.asarray(rows)),
+            classkey(self.classifier_cls),
+            self.folds,
+            repr(self.seed),
+            self._fastloo(x),
+            self._incremental(),
+            '%s.%s' % (self.scorer_cls.__module__, self.scorer_cls.__name__),
+            valuekey(self.scorer_kwargs, strict=False)
+        )
+
+    def _cacher(self, x, y, rows=None):
+        '''
+        Returns a function giving the `cache' key of validating x and y (or their `rows' alone)
+        with the given classifier kwargs and extra, or None if results aren't cached.  The key
+        is None for kwargs or an extra holding functions that can't be told apart (see funckey).
+        '''
+        if self.cache is None or self.seed is None:
+            return None
+        # the data and the settings common to every key, digested once
+        common = CrossValidator._digest(self, x, y, rows)
+
+        def cacher(classifier_kwargs, extra=None):
+            kwargs = deepcopy(self.classifier_kwargs)
+            kwargs.update(classifier_kwargs)
+            try:
+                return ResultCache.key(common, valuekey(kwargs), funckey(extra))
+            except ValueError as e:
+                logging.getLogger(PYXVAL_LOGGER).debug('not caching: %s' % e)
+                return None
+
+        return cacher
+
+    def __farmargs(self, x, y, classifier_kwargs, extra, parallel, checkpoint=None):
+        extra = _checkextra(extra, self.classifier_cls)
+
+        # ndarrays are published to memory-mapped files once rather than pickled into every task,
+        # the caller is responsible for release()ing them
+        x, y = _rows(x), _rows(y)
+        if CrossValidator._fastloo(self, x):
+            order, num = None, 1
+            setup = lambda _: CrossValidator._lootask(self, sx, sy, classifier_kwargs, extra)
+        else:
+            partition = _partition(_nrows(x), self.folds, self.seed)
+            if checkpoint is not None:
+                # a resumed validation must use the folds it started with
+                partition = checkpoint.state('partition', lambda: partition)
+            partition = partition.share(self.pool)
+            order, num = partition.order, self.folds
+            if self.contiguous:
+                partition, x, y = _arrange(partition, x, y)
+            setup = lambda f: CrossValidator._foldtask(self, f, partition, sx, sy, classifier_kwargs, extra)
+            if CrossValidator._incremental(self):
+                # one subtree of contiguous folds per worker, each learning the folds outside of it first
+                subtrees = np.array_split(np.arange(self.folds), min(self.folds, getattr(self.pool, 'processes', None) or cpu_count()) if parallel else 1)
+                num = len(subtrees)
+                setup = lambda t: CrossValidator._treetask(self, int(subtrees[t][0]), int(subtrees[t][-1]) + 1, partition, sx, sy, classifier_kwargs, extra)
+        sx, sy = share(x, self.pool), share(y, self.pool)
+
+        return (sx, sy, order), {
+            'num': num,
+            'setup': setup,
+            'worker': farmworker,
+            'isresult': lambda r: _isfold(r) or _isfolds(r),
+            'attempts': 3,
+            'pickletest': self if parallel else False,
+            'backend': parallel if isinstance(parallel, str) else None,
+            'pool': self.pool,
+            'timeout': self.timeout,
+            'chunksize': self.chunksize
+        }
+
+    def _foldtask(self, f, partition, x, y, classifier_kwargs, extra):
+        kwargs = deepcopy(self.classifier_kwargs)
+        kwargs.update(classifier_kwargs)
+        return (_folder, f, partition, x, y, self.classifier_cls(**kwargs), extra)
 
-        partition = CrossValidator.__partition(len(x), self.folds)
-        # log.debug('partition assignments: %s' % str(partition))
+    def _chaintask(self, f, partition, x, y, chain_kwargs, extra):
+        classifiers = []
+        for classifier_kwargs in chain_kwargs:
+            kwargs = deepcopy(self.classifier_kwargs)
+            kwargs.update(classifier_kwargs)
+            classifiers.append(self.classifier_cls(**kwargs))
+        return (_chainer, f, partition, x, y, classifiers, extra)
 
+    def _treetask(self, lo, hi, partition, x, y, classifier_kwargs, extra):
         kwargs = deepcopy(self.classifier_kwargs)
         kwargs.update(classifier_kwargs)
+        return (_treer, lo, hi, partition, x, y, self.classifier_cls(**kwargs), extra)
 
-        results = farmout(
-            num=self.folds,
-            setup=lambda f: (_folder, f, partition, x, y, self.classifier_cls(**kwargs), extra),
-            worker=farmworker,
-            isresult=lambda r: isinstance(r, tuple) and len(r) == 5,
-            attempts=3,
-            pickletest=self if parallel else False
-        )
+    def _lootask(self, x, y, classifier_kwargs, extra):
+        kwargs = deepcopy(self.classifier_kwargs)
+        kwargs.update(classifier_kwargs)
+        return (_looer, x, y, self.classifier_cls(**kwargs), extra)
 
+    def _collect(self, results):
         stats = self.scorer_cls(**self.scorer_kwargs)
         lret = []
         xtra = []
@@ -174,11 +500,110 @@ class CrossValidator(Validator):
                 xtra.append(x)
             stats.append(t, p, w)
 
-        log.debug('finished %d-fold crossvalidation, performance stats: %s' % (self.folds, stats))
-
         return ValidationResult(
             lret if len(lret) else None,
             stats,
             xtra if len(xtra) else None
         )
 
+    def _signature(self, x, y, classifier_kwargs, extra):
+        # identifies a validation, so that a checkpoint isn't resumed by another
+        kwargs = deepcopy(self.classifier_kwargs)
+        kwargs.update(classifier_kwargs)
+        return ResultCache.key(CrossValidator._digest(self, x, y), valuekey(kwargs, strict=False), funckey(extra, strict=False))
+
+    def __cached(self, x, y, classifier_kwargs, extra):
+        # the cache key of this validation, and its result if it's been cached
+        cacher = CrossValidator._cacher(self, x, y)
+        if cacher is None:
+            return None, None
+        key = cacher(classifier_kwargs, extra)
+        ret = self.cache.get(key) if key is not None else None
+        if ret is not None:
+            logging.getLogger(PYXVAL_LOGGER).debug('found %d-fold crossvalidation in the cache' % self.folds)
+        return key, ret
+
+    def validate(self, x, y, classifier_kwargs={}, extra=None, parallel=True, resume=None):
+        '''
+        Runs crossvalidation on the provided data.  The length of the :py:obj:`x` array should be identical to :py:obj:`y`
+        and will be used to partition the lists by index.
+        :param x: observations, needs to implement __len__ and __getitem__ aka len(x), x[i], or a scipy.sparse matrix,
+            an np.memmap or the path of an .npy file, which workers map and read only their folds' rows of
+        :param y: expected output, needs to implement __getitem__, aka y[i]
+        :param classifier_kwargs: a dictionary of parameters to pass to the classifier
+        :param extra: @todo extra information to pull out of the classifier
+        :param parallel: True, False, or the name of the backend to farm the folds out with ('process', 'thread' or 'serial')
+        :param resume: a :py:class:`Checkpoint`, or the path of one, to which the finished folds are saved as
+            they come in, and from which an interrupted validation picks up where it left off
+        :returns: @todo figure this out
+        '''
+        log = logging.getLogger(PYXVAL_LOGGER)
+
+        key, ret = CrossValidator.__cached(self, x, y, classifier_kwargs, extra)
+        if ret is not None:
+            return ret
+
+        log.debug('beginning %d-fold crossvalidation' % self.folds)
+
+        checkpoint = _checkpoint(resume)
+        if checkpoint is not None:
+            checkpoint.check(CrossValidator._signature(self, x, y, classifier_kwargs, extra))
+
+        shared, farmargs = CrossValidator.__farmargs(self, x, y, classifier_kwargs, extra, parallel, checkpoint)
+
+        try:
+            results = farmout(**farmargs) if checkpoint is None else resumed(checkpoint, 'folds', farmargs)
+        finally:
+            release(*shared)
+
+        ret = CrossValidator._collect(self, _unnest(results))
+
+        log.debug('finished %d-fold crossvalidation, performance stats: %s' % (self.folds, ret.stats))
+
+        if key is not None:
+            self.cache.put(key, ret)
+
+        return ret
+
+    async def avalidate(self, x, y, classifier_kwargs={}, extra=None, parallel=True):
+        '''
+        The asyncio counterpart to :py:meth:`validate`, awaiting the folds concurrently
+        without blocking the event loop.  Cancelling it abandons the outstanding folds.
+        '''
+        log = logging.getLogger(PYXVAL_LOGGER)
+
+        key, ret = CrossValidator.__cached(self, x, y, classifier_kwargs, extra)
+        if ret is not None:
+            return ret
+
+        log.debug('beginning %d-fold crossvalidation' % self.folds)
+
+        shared, farmargs = CrossValidator.__farmargs(self, x, y, classifier_kwargs, extra, parallel)
+
+        try:
+            results = await afarmout(**farmargs)
+        finally:
+            release(*shared)
+
+        ret = CrossValidator._collect(self, _unnest(results))
+
+        log.debug('finished %d-fold crossvalidation, performance stats: %s' % (self.folds, ret.stats))
+
+        if key is not None:
+            self.cache.put(key, ret)
+
+        return ret
+
+    def ivalidate(self, x, y, classifier_kwargs={}, extra=None, parallel=True):
+        '''
+        Like :py:meth:`validate`, but yields a :py:class:`ValidationResult` for each fold
+        as soon as that fold is finished, in no particular order.
+        '''
+        shared, farmargs = CrossValidator.__farmargs(self, x, y, classifier_kwargs, extra, parallel)
+
+        try:
+            for _, r in ifarmout(**farmargs):
+                for f in _unnest([r]):
+                    yield CrossValidator._collect(self, [f])
+        finally:
+            release(*shared)
@@ -1,34 +1,79 @@
 
 from __future__ import division, print_function
 
+import asyncio
 import logging
 
-from multiprocessing import Pool, cpu_count, current_process
-from os import getenv
+from collections import deque
+from contextlib import contextmanager
+from itertools import count
+from multiprocessing import Process, TimeoutError, cpu_count, current_process, get_context
+from multiprocessing.managers import BaseManager, EventProxy
+from multiprocessing.pool import ThreadPool
+from os import environ, getenv, getpid, urandom
+from socket import create_connection
 from sys import exc_info, exit as sys_exit, stderr
+from threading import Event, Lock, Thread, local
+from time import sleep, time
+
+try:
+    from queue import Empty, Queue
+except ImportError:
+    from Queue import Empty, Queue
 
 try:
     import pickle as pickle
 except ImportError:
     import pickle
 
+try:
+    from os import sched_getaffinity, sched_setaffinity
+except ImportError:
+    sched_getaffinity, sched_setaffinity = None, None
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
 
 __all__ = [
+    'BACKENDS',
     'FAKEMP_LOGGER',
     'FakeLock',
     'FakeResult',
     'FakePool',
+    'ManagerPool',
+    'ManagerResult',
+    'WorkerPool',
+    'afarmout',
     'create_pool',
     'farmout',
-    'farmworker'
+    'farmworker',
+    'ifarmout',
+    'serve'
 ]
 
 __version__ = '0.9.1'
 
 FAKEMP_LOGGER = '2dTXjMDeFheXx5QjWZmz8XHz'
 
+BACKENDS = ('process', 'thread', 'serial')
+
+# roughly how long (in seconds) an adaptively sized chunk of tasks should take
+CHUNK_SECONDS = 0.1
+
+# environment variables capping the threads of the common BLAS/OpenMP runtimes
+THREAD_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
 _mp = None
 
+# tells apart the chunks whose start workers report back (see _chunkworker)
+_tokens = count()
+
+# the worker's end of its pool, through which it reports the chunks it starts
+_worker = local()
+
 
 def _setup_log():
     h = logging.StreamHandler()
@@ -54,12 +99,25 @@ class FakeLock(object):
 
 class FakePool(object):
 
+    backend = 'serial'
+
     def __init__(self):
         pass
 
     @staticmethod
-    def apply_async(f, args):
-        return FakeResult(f(*args))
+    def apply_async(f, args, callback=None, error_callback=None):
+        if callback is None and error_callback is None:
+            return FakeResult(f(*args))
+        try:
+            r = f(*args)
+        except Exception as e:
+            if error_callback is None:
+                raise
+            error_callback(e)
+            return FakeResult(e)
+        if callback is not None:
+            callback(r)
+        return FakeResult(r)
 
     @staticmethod
     def terminate():
@@ -82,8 +140,16 @@ class FakeResult(object):
     def get(self, timeout=0xFFFF):
         return self.__vals
 
+    @staticmethod
+    def ready():
+        return True
+
+    @staticmethod
+    def wait(timeout=None):
+        pass
+
 
-def create_pool(pickletest):
+def _backend(backend=None):
     global _mp
 
     log = logging.getLogger(FAKEMP_LOGGER)
@@ -91,73 +157,780 @@ def create_pool(pickletest):
     if _mp is None:
         mp = getenv('PYMP', 'true').lower().strip()
 
+        if mp in BACKENDS:
+            _mp = mp
+        else:
+            try:
+                _mp = 'serial' if mp == 'false' else 'process' if mp == 'true' else BACKENDS[0 if bool(int(mp)) else 2]
+            except ValueError:
+                _mp = 'serial'
+
+        if _mp != 'process':
+            log.debug('%s backend selected by PYMP environment var' % _mp)
+
+    if backend is None:
+        backend = _mp
+    elif backend not in BACKENDS:
+        raise ValueError('backend must be one of %s' % ', '.join(BACKENDS))
+
+    # daemonic processes aren't allowed to have children of their own
+    if backend == 'process' and current_process().daemon:
+        backend = 'serial'
+
+    return backend
+
+
+def _picklable(pickletest):
+    log = logging.getLogger(FAKEMP_LOGGER)
+
+    if pickletest is False:
+        return False
+
+    try:
+        pickle.dumps(pickletest)
+    except pickle.PicklingError:
+        log.debug('multiprocessing disabled because pickle cannot handle given objects')
+        return False
+
+    return True
+
+
+def _preload(modules):
+    for m in modules:
+        __import__(m)
+
+
+def _cpus():
+    return sorted(sched_getaffinity(0)) if sched_getaffinity is not None else list(range(cpu_count()))
+
+
+def _threads(processes, threads=None):
+    # by default share the cpus out between the workers rather than have each of them use all of them
+    return max(1, len(_cpus()) // processes) if threads is None else threads
+
+
+@contextmanager
+def _threadenv(threads):
+    # workers take the environment they're started with, which reaches the runtimes they load
+    # while starting up (unpickling their target, importing the main module) before _initworker
+    # gets to run, the parent's own environment being put back afterwards
+    saved = dict((var, environ.get(var)) for var in THREAD_VARS)
+    environ.update((var, str(threads)) for var in THREAD_VARS)
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                environ.pop(var, None)
+            else:
+                environ[var] = value
+
+
+# whether the lack of threadpoolctl has been warned of, which is only done once as
+# create_pool() starts a pool for every call to farmout
+_warnedthreads = False
+
+
+def _checkthreads(threads):
+    # forked workers inherit the runtimes the parent already loaded, whose thread pools
+    # only threadpoolctl can shrink
+    global _warnedthreads
+    if threadpool_limits is None and threads < len(_cpus()) and not _warnedthreads:
+        _warnedthreads = True
+        logging.getLogger(FAKEMP_LOGGER).warning(
+            'threadpoolctl is not installed, so BLAS/OpenMP runtimes loaded before the workers started '
+            'may use more than %d thread(s) in each of them' % threads
+        )
+
+
+def _initworker(preload, threads, notices=None, cpus=None, counter=None):
+    if notices is not None:
+        _worker.notify = lambda token: notices.send((token, getpid(), time()))
+    # for the workers started later on (e.g. replacing those past maxtasksperchild) the variables
+    # only reach runtimes loaded from here on, threadpoolctl reaches those already loaded
+    for var in THREAD_VARS:
+        environ[var] = str(threads)
+    if threadpool_limits is not None:
+        threadpool_limits(threads)
+    if cpus is not None and counter is not None and sched_setaffinity is not None:
+        # pin every worker to its own block of `threads' cpus
+        with counter.get_lock():
+            k = counter.value
+            counter.value += 1
+        sched_setaffinity(0, set(cpus[(k * threads + j) % len(cpus)] for j in range(threads)))
+    _preload(preload)
+
+
+def _initthread(preload, started):
+    _worker.notify = lambda token: started.__setitem__(token, (getpid(), time()))
+    _preload(preload)
+
+
+def _detached_pool():
+    return None
+
+
+class WorkerPool(object):
+    '''
+    A long-lived pool of worker processes which can be shared by many calls to
+    :py:func:`farmout`, so that process start-up (and module import) costs are paid once.
+    Falls back to serial execution whenever multiprocessing is unavailable.
+    :param processes: the number of worker processes, defaults to cpu_count()
+    :param maxtasksperchild: recycle each worker after this many tasks (useful for leaky classifiers)
+    :param preload: names of modules to import in every worker before any task is run
+    :param start_method: the multiprocessing start method to use, e.g. 'forkserver'
+    :param backend: one of BACKENDS, defaults to what the PYMP environment var asks for
+    :param threads: the BLAS/OpenMP threads each worker process may use, defaults to cpu_count() / processes
+    :param affinity: if True, pin each worker process to its own set of `threads' cpus
+    '''
+
+    def __init__(self, processes=None, maxtasksperchild=None, preload=(), start_method=None, backend=None, threads=None, affinity=False):
+        self.processes = cpu_count() if processes is None else processes
+        self.maxtasksperchild = maxtasksperchild
+        self.preload = tuple(preload)
+        self.start_method = start_method
+        self.backend = _backend(backend)
+        self.threads = _threads(self.processes, threads)
+        self.affinity = affinity
+
+        # the (pid, time) at which each chunk of tasks started running, see _started()
+        self.__started = {}
+        self.__listening = None
+        # the results of tasks given up on, which may never come in, see _abandon()
+        self.__abandoned = []
+
+        if self.backend == 'process':
+            ctx = get_context(start_method)
+            # the forkserver imports these once, every worker forked from it inherits them
+            if ctx.get_start_method() == 'forkserver' and len(self.preload):
+                ctx.set_forkserver_preload(list(self.preload))
+            # the notices are tiny, so the workers' writes to the pipe are atomic without a lock
+            # that a terminated worker could die holding
+            self.__notices, notices = ctx.Pipe(duplex=False)
+            initargs = (self.preload, self.threads, notices)
+            if affinity:
+                initargs += (_cpus(), ctx.Value('i', 0))
+            _checkthreads(self.threads)
+            with _threadenv(self.threads):
+                self.__pool = ctx.Pool(self.processes, _initworker, initargs, maxtasksperchild)
+            self.__listening = Event()
+            self.__listening.set()
+            listener = Thread(target=self.__listen, args=(self.__notices, self.__listening))
+            listener.daemon = True
+            listener.start()
+        elif self.backend == 'thread':
+            self.__pool = ThreadPool(self.processes, _initthread, (self.preload, self.__started))
+        else:
+            self.__pool = FakePool()
+
+    def __listen(self, notices, listening):
+        while listening.is_set():
+            try:
+                if notices.poll(0.1):
+                    token, pid, started = notices.recv()
+                    self.__started[token] = (pid, started)
+            except (EOFError, OSError):
+                break
+
+    def __stop(self):
+        if self.__listening is not None:
+            self.__listening.clear()
+            self.__listening = None
+
+    @property
+    def parallel(self):
+        return self.__pool is not None and not isinstance(self.__pool, FakePool)
+
+    def apply_async(self, f, args, callback=None, error_callback=None):
+        if self.__pool is None:
+            raise ValueError('WorkerPool has already been shut down')
+        return self.__pool.apply_async(f, args, callback=callback, error_callback=error_callback)
+
+    def _started(self, token):
+        # the (pid, time) at which the chunk sent along with `token' started running,
+        # None while it's still waiting in the pool's queue
+        return self.__started.get(token)
+
+    def _forget(self, token):
+        self.__started.pop(token, None)
+
+    def _lost(self, token):
+        # whether the worker process running the chunk sent along with `token' has died
+        started = self.__started.get(token)
+        workers = getattr(self.__pool, '_pool', None)
+        if started is None or self.backend != 'process' or workers is None:
+            return False
+        return started[0] not in [p.pid for p in workers if p.exitcode is None]
+
+    def _abandon(self, r):
+        # the task behind the result `r' timed out or its worker died, so it may never finish
+        self.__abandoned.append(r)
+
+    def __stuck(self):
+        # a pool only joins once every task has finished, which abandoned ones may never do
+        self.__abandoned = [r for r in self.__abandoned if not r.ready()]
+        return len(self.__abandoned) > 0
+
+    def close(self):
+        if self.__pool is not None:
+            self.__pool.close()
+
+    def join(self):
+        if self.__pool is not None:
+            if self.__stuck():
+                self.__pool.terminate()
+            self.__pool.join()
+            self.__stop()
+
+    def terminate(self):
+        if self.__pool is not None:
+            self.__pool.terminate()
+            self.__stop()
+
+    def shutdown(self, wait=True):
+        if self.__pool is None:
+            return
+        if wait and not self.__stuck():
+            self.__pool.close()
+        else:
+            self.__pool.terminate()
+        self.__pool.join()
+        self.__stop()
+        self.__pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=exc_type is None)
+        return False
+
+    # worker processes are only meaningful to the process that started them,
+    # so any copy shipped elsewhere (e.g. along with a validator) comes back detached
+    def __reduce__(self):
+        return _detached_pool, ()
+
+
+def _authkey(authkey=None):
+    if authkey is None:
+        authkey = getenv('PYXVAL_AUTHKEY')
+    if isinstance(authkey, str):
+        authkey = authkey.encode('utf-8')
+    return authkey
+
+
+class _WorkerManager(BaseManager):
+    pass
+
+_WorkerManager.register('tasks')
+_WorkerManager.register('results')
+_WorkerManager.register('closed', proxytype=EventProxy)
+
+
+class ManagerResult(object):
+    '''
+    The eventual result of a task submitted to a :py:class:`ManagerPool`, with the
+    same interface as the AsyncResult of a multiprocessing pool.
+    '''
+
+    def __init__(self, callback=None, error_callback=None):
+        self.__event = Event()
+        self.__success = None
+        self.__value = None
+        self.__callback = callback
+        self.__error_callback = error_callback
+
+    def _set(self, success, value):
+        self.__success, self.__value = success, value
+        self.__event.set()
+        if success and self.__callback is not None:
+            self.__callback(value)
+        elif not success and self.__error_callback is not None:
+            self.__error_callback(value)
+
+    def ready(self):
+        return self.__event.is_set()
+
+    def successful(self):
+        if not self.ready():
+            raise ValueError('result is not ready')
+        return self.__success
+
+    def wait(self, timeout=None):
+        self.__event.wait(timeout)
+
+    def get(self, timeout=None):
+        self.wait(timeout)
+        if not self.ready():
+            raise TimeoutError
+        if not self.__success:
+            raise self.__value
+        return self.__value
+
+
+class ManagerPool(object):
+    '''
+    A pool whose workers may live on other machines: tasks are served over TCP by a
+    :py:mod:`multiprocessing.managers` server running in this process, and pulled by the
+    worker processes started with :py:func:`serve` (or `python -m pyxval._fakemp`) on any
+    host that can reach `address'.  It can be passed as the pool to :py:func:`farmout`
+    or to any validator, just like a :py:class:`WorkerPool`.
+    :param address: the (host, port) to listen on, port 0 picks a free one (see .address)
+    :param authkey: the key workers must present, defaults to the PYXVAL_AUTHKEY environment var or a random key
+    :param processes: roughly how many workers will connect, only used to size chunks of tasks
+    '''
+
+    backend = 'manager'
+
+    # the workers may not share a filesystem with us, so data is shipped along with every task
+    local = False
+
+    def __init__(self, address=('', 0), authkey=None, processes=None):
+        self.authkey = _authkey(authkey) or urandom(16)
+        self.processes = processes
+        self.__tasks = Queue()
+        self.__results = Queue()
+        self.__closed = Event()
+        self.__accepting = True
+        self.__pending = {}
+        self.__started = {}
+        self.__lock = Lock()
+        self.__taskid = 0
+
+        class _Manager(BaseManager):
+            pass
+
+        _Manager.register('tasks', callable=lambda: self.__tasks)
+        _Manager.register('results', callable=lambda: self.__results)
+        _Manager.register('closed', callable=lambda: self.__closed, proxytype=EventProxy)
+
+        self.__server = _Manager(address, self.authkey).get_server()
+        self.__server.stop_event = Event()
+        self.address = self.__server.address
+
+        self.__accepter = Thread(target=self.__accept)
+        self.__accepter.daemon = True
+        self.__accepter.start()
+        self.__collector = Thread(target=self.__collect)
+        self.__collector.daemon = True
+        self.__collector.start()
+
+    def __accept(self):
+        while not self.__closed.is_set():
+            try:
+                c = self.__server.listener.accept()
+            except Exception:
+                # failed handshakes (and the one waking us up to stop) land here
+                continue
+            t = Thread(target=self.__server.handle_request, args=(c,))
+            t.daemon = True
+            t.start()
+
+    def __collect(self):
+        while True:
+            item = self.__results.get()
+            if item is None:
+                break
+            taskid, success, value = item
+            if taskid is None:
+                # a worker has started a chunk, timed by our clock rather than the worker's
+                token, pid = value
+                self.__started[token] = (pid, time())
+                continue
+            with self.__lock:
+                r = self.__pending.pop(taskid, None)
+            # results of terminated tasks may still trickle in
+            if r is not None:
+                r._set(success, value)
+
+    @property
+    def parallel(self):
+        return not self.__closed.is_set()
+
+    def _started(self, token):
+        return self.__started.get(token)
+
+    def _forget(self, token):
+        self.__started.pop(token, None)
+
+    def _abandon(self, r):
+        # a task given up on may have died along with its (remote) worker, so join() mustn't wait for it
+        with self.__lock:
+            for taskid in [t for t, p in self.__pending.items() if p is r]:
+                del self.__pending[taskid]
+        r._set(False, RuntimeError('the task was abandoned'))
+
+    def apply_async(self, f, args, callback=None, error_callback=None):
+        if not self.__accepting:
+            raise ValueError('ManagerPool has already been closed')
+        # pickle here so that unpicklable tasks fail now, rather than in some worker
+        task = pickle.dumps((f, tuple(args)), pickle.HIGHEST_PROTOCOL)
+        r = ManagerResult(callback, error_callback)
+        with self.__lock:
+            taskid = self.__taskid
+            self.__taskid += 1
+            self.__pending[taskid] = r
+        self.__tasks.put((taskid, task))
+        return r
+
+    def close(self):
+        self.__accepting = False
+
+    def join(self):
+        while True:
+            with self.__lock:
+                pending = list(self.__pending.values())
+            if not len(pending):
+                break
+            pending[0].wait()
+        self.__stop()
+
+    def terminate(self):
+        self.__accepting = False
+        with self.__lock:
+            pending = list(self.__pending.values())
+            self.__pending.clear()
+        for r in pending:
+            r._set(False, RuntimeError('ManagerPool was terminated'))
+        self.__stop()
+
+    def shutdown(self, wait=True):
+        if wait:
+            self.close()
+            self.join()
+        else:
+            self.terminate()
+
+    def __stop(self):
+        if self.__closed.is_set():
+            return
+        self.__closed.set()
+        self.__results.put(None)
+        # wake the accepter up so that it notices, then stop listening
+        host, port = self.address[:2]
         try:
-            _mp = False if mp == 'false' else True if mp == 'true' else bool(int(mp))
-        except ValueError:
-            _mp = False
+            create_connection((host if host not in ('', '0.0.0.0') else '127.0.0.1', port)).close()
+        except Exception:
+            pass
+        self.__accepter.join()
+        self.__server.listener.close()
 
-        if not _mp:
-            log.debug('multiprocessing disabled at request of PYMP environment var')
+    def __enter__(self):
+        return self
 
-    mp = _mp and not current_process().daemon
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=exc_type is None)
+        return False
 
-    if mp is False:
-        pass
-    elif pickletest is False:
-        mp = False
-    else:
+    def __reduce__(self):
+        return _detached_pool, ()
+
+
+def _managerworker(address, authkey, threads, patience):
+    _initworker((), threads)
+
+    manager = _WorkerManager(address, authkey)
+    # the coordinator may not be up yet
+    deadline = time() + patience
+    while True:
         try:
-            pickle.dumps(pickletest)
-        except pickle.PicklingError:
-            mp = False
-            log.debug('multiprocessing disabled because pickle cannot handle given objects')
+            manager.connect()
+            break
+        except (EOFError, OSError):
+            if time() > deadline:
+                raise
+            sleep(0.5)
 
-    if mp:
-        pool = Pool(cpu_count())
+    tasks, results, closed = manager.tasks(), manager.results(), manager.closed()
+    _worker.notify = lambda token: results.put((None, True, (token, getpid())))
+
+    try:
+        while not closed.is_set():
+            try:
+                taskid, task = tasks.get(timeout=1)
+            except Empty:
+                continue
+            try:
+                f, args = pickle.loads(task)
+                r = (taskid, True, f(*args))
+            except Exception as e:
+                r = (taskid, False, e)
+            try:
+                results.put(r)
+            except (EOFError, OSError):
+                raise
+            except Exception as e:
+                # most likely the result (or its exception) doesn't pickle
+                results.put((taskid, False, RuntimeError('task %d failed to return: %s' % (taskid, repr(e)))))
+    except (EOFError, OSError):
+        # the coordinator has gone away
+        pass
+
+
+def serve(address, authkey=None, processes=None, threads=None, patience=60):
+    '''
+    Runs `processes' worker processes on this host, pulling tasks from the
+    :py:class:`ManagerPool` at `address' until it shuts down.
+    :param authkey: the pool's key, defaults to the PYXVAL_AUTHKEY environment var
+    :param processes: the number of worker processes, defaults to cpu_count()
+    :param threads: the BLAS/OpenMP threads each worker may use, defaults to cpu_count() / processes
+    :param patience: how many seconds to keep trying to reach the pool before giving up
+    '''
+    processes = cpu_count() if processes is None else processes
+    threads = _threads(processes, threads)
+    workers = [Process(target=_managerworker, args=(tuple(address), _authkey(authkey), threads, patience)) for _ in range(processes)]
+    _checkthreads(threads)
+    with _threadenv(threads):
+        for w in workers:
+            w.daemon = True
+            w.start()
+    for w in workers:
+        w.join()
+
+
+def create_pool(pickletest, backend=None):
+    backend = _backend(backend)
+
+    if pickletest is False:
+        pool = FakePool()
+    elif backend == 'thread':
+        # threads share everything, so there's no need to check whether pickle copes
+        pool = WorkerPool(cpu_count(), backend='thread')
+    elif backend == 'process' and _picklable(pickletest):
+        pool = WorkerPool(cpu_count(), backend='process')
     else:
         pool = FakePool()
 
     return pool
 
 
-def farmout(num, setup, worker, isresult, attempts=3, pickletest=None):
+def _shared_pool(pool, pickletest, backend):
+    # only use the shared pool if we're allowed to and able to
+    if pool is not None:
+        pool_backend = getattr(pool, 'backend', 'process')
+        if backend is not None and backend != pool_backend:
+            return None
+        elif pickletest is False or pool_backend != 'thread' and not _picklable(pickletest):
+            return FakePool()
+    return pool
+
+
+def _interrupted(r):
+    return r is KeyboardInterrupt or isinstance(r, KeyboardInterrupt)
+
+
+def _workers(pool):
+    return getattr(pool, 'processes', None) or getattr(pool, '_processes', None) or cpu_count()
+
+
+def _chunkworker(worker, argss, token=None):
+    # run a whole chunk of tasks in one go, timing each so the parent can size later chunks
+    notify = getattr(_worker, 'notify', None)
+    if token is not None and notify is not None:
+        # so that the chunk is timed from now rather than from when it was queued
+        notify(token)
+    results = []
+    for args in argss:
+        started = time()
+        try:
+            r = worker(*args)
+        except Exception as e:
+            r = e
+        results.append((r, time() - started))
+    return results
+
+
+def _started(pool, token, submitted):
+    # when a chunk started running, or None while it waits in the pool's queue,
+    # chunks sent without a token are timed from when they were submitted
+    if token is None:
+        return submitted
+    started = pool._started(token)
+    return None if started is None else started[1]
+
+
+def _overdue(pool, token, submitted, timeout, n):
+    # whether a chunk of n tasks has been running for longer than they're given
+    if timeout is None:
+        return False
+    started = _started(pool, token, submitted)
+    return started is not None and time() - started > timeout * n
+
+
+def _dead(pool, token):
+    # whether the worker running a chunk has died
+    lost = getattr(pool, '_lost', None)
+    return token is not None and lost is not None and lost(token)
+
+
+def _lost(pool, token, r):
+    # whether a chunk's worker has died, giving its result a moment to come in first,
+    # as a worker recycled by maxtasksperchild exits as soon as it has sent it
+    if not _dead(pool, token):
+        return False
+    r.wait(1.)
+    return not r.ready()
+
+
+def _abandon(pool, r):
+    # let the pool know not to wait for the task behind `r' when it's joined
+    abandon = getattr(pool, '_abandon', None)
+    if abandon is not None:
+        abandon(r)
+
+
+def _chunksize(seconds, remaining, workers):
+    # aim for chunks of about CHUNK_SECONDS, but never so large that some workers sit idle
+    size = int(CHUNK_SECONDS / max(seconds, 1e-6))
+    return max(1, min(size, -(-remaining // (2 * workers))))
+
+
+def ifarmout(num, setup, worker, isresult, attempts=3, pickletest=None, pool=None, timeout=None, failfast=True, backend=None, chunksize=None, lookahead=None):
+    '''
+    Runs worker(*setup(i)) for i in range(num), yielding (i, result) pairs in the order the tasks finish.
+    Each task is retried on its own, on the same pool, until isresult() accepts its result
+    or it has been tried `attempts' times.
+    If a :py:class:`WorkerPool` is given it is used (and left running) instead of creating
+    a fresh pool.
+    :param timeout: wall-clock seconds, from when it starts running, after which an unfinished task
+        counts as failed and is resubmitted, as does a task whose worker process dies
+    :param failfast: if False, tasks that never succeed yield their last exception instead of it being raised
+    :param backend: one of BACKENDS to use for this call instead of the pool (or the PYMP environment var)
+    :param chunksize: the number of tasks sent to a worker at once, by default this adapts to how long tasks take
+    :param lookahead: the most tasks set up ahead of the results yielded so far, for when setup()
+        depends on the results of earlier tasks
+    '''
+    log = logging.getLogger(FAKEMP_LOGGER)
+
+    if pickletest is None:
+        pickletest = worker
+
+    shared = _shared_pool(pool, pickletest, backend)
+    pool = create_pool(pickletest, backend) if shared is None else shared
+
+    # adaptive chunking starts with single tasks and only keeps a few chunks in flight,
+    # so that the chunk size can follow the measured task duration
+    adaptive = chunksize is None
+    size = 1 if adaptive else max(1, int(chunksize))
+    inflight = 2 * _workers(pool) if adaptive else num
+    # chunks are timed from when they start running on pools that say when that is, on the
+    # rest from when they're submitted, so then none may wait in the pool's queue
+    reporting = hasattr(pool, '_started')
+    if timeout is not None and not reporting:
+        inflight = min(inflight, _workers(pool))
+    if lookahead is not None:
+        lookahead = max(1, lookahead)
+        size = min(size, lookahead)
+    elapsed, measured = 0., 0
+
+    queue = deque(range(num))
+    tries = [0] * num
+    pending = {}
+    abandoned = False
+    finished = False
+
+    def submittable():
+        if not len(queue) or len(pending) >= inflight:
+            return False
+        return lookahead is None or sum(len(chunk) for chunk in pending) < lookahead
+
+    def submit():
+        n = min(size, len(queue))
+        if lookahead is not None:
+            n = min(n, lookahead - sum(len(chunk) for chunk in pending))
+        chunk = tuple(queue.popleft() for _ in range(n))
+        for i in chunk:
+            tries[i] += 1
+        token = next(_tokens) if reporting else None
+        try:
+            r = pool.apply_async(_chunkworker, (worker, [setup(i) for i in chunk], token))
+        except Exception as e:
+            # FakePool runs the task right here, so its errors surface here too
+            r = FakeResult([(e, 0.)] * len(chunk))
+        pending[chunk] = (r, time(), token)
+
     try:
-        if pickletest is None:
-            pickletest = worker
-        results = [None] * num
-        undone = range(num)
-        for _ in range(attempts):
-            pool = create_pool(pickletest)
+        while len(queue) or len(pending):
+            while submittable():
+                submit()
 
-            for i in undone:
-                results[i] = pool.apply_async(worker, setup(i))
+            done = []
+            for chunk, (r, submitted, token) in pending.items():
+                if r.ready():
+                    try:
+                        done.append((chunk, r.get(0)))
+                    except Exception as e:
+                        done.append((chunk, [(e, 0.)] * len(chunk)))
+                elif _overdue(pool, token, submitted, timeout, len(chunk)):
+                    abandoned = True
+                    _abandon(pool, r)
+                    done.append((chunk, [(TimeoutError('task %d did not finish within %g seconds' % (i, timeout)), 0.) for i in chunk]))
+                elif _lost(pool, token, r):
+                    abandoned = True
+                    _abandon(pool, r)
+                    done.append((chunk, [(RuntimeError('the worker running task %d died' % i), 0.) for i in chunk]))
 
-            pool.close()
-            pool.join()
+            if not len(done):
+                # block briefly on the oldest outstanding chunk rather than spin
+                chunk, (r, submitted, token) = next(iter(pending.items()))
+                started = None if timeout is None else _started(pool, token, submitted)
+                wait = 0.1 if started is None else max(0., min(0.1, started + timeout * len(chunk) - time()))
+                r.wait(wait)
+                continue
 
-            for i in undone:
-                results[i] = results[i].get(0xFFFF)
+            retries = []
+            for chunk, results in done:
+                _, _, token = pending.pop(chunk)
+                if token is not None:
+                    pool._forget(token)
+                for i, (r, seconds) in zip(chunk, results):
+                    if _interrupted(r):
+                        raise KeyboardInterrupt
+                    if isresult(r):
+                        elapsed += seconds
+                        measured += 1
+                    else:
+                        if tries[i] < attempts:
+                            log.debug('task %d failed on attempt %d, retrying: %s' % (i, tries[i], repr(r)))
+                            retries.append(i)
+                            continue
+                        if failfast:
+                            if isinstance(r, Exception):
+                                raise r
+                            raise RuntimeError("Random and unknown weirdness happened while trying to farm out work to child processes")
+                    yield i, r
 
-            if any([isinstance(r, KeyboardInterrupt) for r in results]):
-                raise KeyboardInterrupt
-            else:
-                undone = [i for i, r in enumerate(results) if not isresult(r)]
-                if not len(undone):
-                    break
+            # retries go to the front of the queue
+            queue.extendleft(reversed(retries))
 
-        excs = [e for e in results if isinstance(e, Exception)]
-        if len(excs):
-            raise excs[0]
+            if adaptive and measured:
+                size = _chunksize(elapsed / measured, len(queue), _workers(pool))
+
+        finished = True
+
+    finally:
+        # a pool the caller owns is left be, even when interrupted
+        if shared is None:
+            # a timed-out (or interrupted) task may never return, so don't wait around for it
+            if finished and not abandoned:
+                pool.close()
+            else:
+                pool.terminate()
+            pool.join()
 
-        if not all([isresult(r) for r in results]):
-            raise RuntimeError("Random and unknown weirdness happened while trying to farm out work to child processes")
 
+def farmout(num, setup, worker, isresult, attempts=3, pickletest=None, pool=None, timeout=None, failfast=True, backend=None, chunksize=None):
+    '''
+    Runs worker(*setup(i)) for i in range(num) and returns the list of results,
+    see :py:func:`ifarmout` for the meaning of the remaining arguments.
+    '''
+    try:
+        results = [None] * num
+        for i, r in ifarmout(num, setup, worker, isresult, attempts, pickletest, pool, timeout, failfast, backend, chunksize):
+            results[i] = r
         return results
 
     except KeyboardInterrupt as e:
-        if pool is not None:
-            pool.terminate()
-            pool.join()
         if current_process().daemon:
             return e
         else:
@@ -165,6 +938,123 @@ def farmout(num, setup, worker, isresult, attempts=3, pickletest=None):
             sys_exit(-1)
 
 
+async def afarmout(num, setup, worker, isresult, attempts=3, pickletest=None, pool=None, timeout=None, failfast=True, backend=None, chunksize=None):
+    '''
+    The asyncio counterpart to :py:func:`farmout`: awaits every task concurrently without
+    blocking the event loop, and returns the list of results.  Cancelling it abandons
+    all outstanding tasks.  Several calls may share one :py:class:`WorkerPool`.
+    '''
+    log = logging.getLogger(FAKEMP_LOGGER)
+    loop = asyncio.get_event_loop()
+
+    if pickletest is None:
+        pickletest = worker
+
+    shared = _shared_pool(pool, pickletest, backend)
+    pool = create_pool(pickletest, backend) if shared is None else shared
+
+    # serial work would block the event loop, so do it one task at a time in a background thread
+    if getattr(pool, 'backend', None) == 'serial':
+        pool, shared = WorkerPool(1, backend='thread'), None
+
+    # as in ifarmout, chunks are timed from when they start running on pools that say when
+    # that is, so only a few are kept in flight, and on the rest none may wait in the queue
+    reporting = hasattr(pool, '_started')
+    slots = asyncio.Semaphore(_workers(pool) if timeout is not None and not reporting else 2 * _workers(pool))
+
+    abandoned = [False]
+
+    def resolve(fut, r):
+        if not fut.done():
+            fut.set_result(r)
+
+    def callback(fut):
+        def _callback(r):
+            try:
+                loop.call_soon_threadsafe(resolve, fut, r)
+            except RuntimeError:
+                # the event loop has gone away, nobody is waiting on this anymore
+                pass
+        return _callback
+
+    async def submit(chunk):
+        token = next(_tokens) if reporting else None
+        async with slots:
+            fut = loop.create_future()
+            r = pool.apply_async(_chunkworker, (worker, [setup(i) for i in chunk], token), callback=callback(fut), error_callback=callback(fut))
+            submitted = time()
+            try:
+                while True:
+                    done, _ = await asyncio.wait({fut}, timeout=0.1)
+                    if len(done):
+                        return fut.result()
+                    if _overdue(pool, token, submitted, timeout, len(chunk)):
+                        error = lambda i: TimeoutError('task %d did not finish within %g seconds' % (i, timeout))
+                    elif _dead(pool, token) and not len((await asyncio.wait({fut}, timeout=1.))[0]):
+                        error = lambda i: RuntimeError('the worker running task %d died' % i)
+                    elif fut.done():
+                        return fut.result()
+                    else:
+                        continue
+                    abandoned[0] = True
+                    _abandon(pool, r)
+                    return [(error(i), 0.) for i in chunk]
+            finally:
+                if token is not None:
+                    pool._forget(token)
+
+    async def run(chunk):
+        results = {}
+        for attempt in range(attempts):
+            rs = await submit(chunk)
+            if isinstance(rs, Exception):
+                rs = [(rs, 0.)] * len(chunk)
+            retries = []
+            for i, (r, _) in zip(chunk, rs):
+                if _interrupted(r):
+                    raise KeyboardInterrupt
+                results[i] = r
+                if not isresult(r):
+                    retries.append(i)
+            chunk = retries
+            if not len(chunk):
+                break
+            if attempt + 1 < attempts:
+                log.debug('tasks %s failed on attempt %d, retrying' % (str(list(chunk)), attempt + 1))
+        if len(chunk) and failfast:
+            r = results[chunk[0]]
+            if isinstance(r, Exception):
+                raise r
+            raise RuntimeError("Random and unknown weirdness happened while trying to farm out work to child processes")
+        return results
+
+    # chunks are only used when asked for
+    size = 1 if chunksize is None else max(1, int(chunksize))
+    tasks = [asyncio.ensure_future(run(list(range(i, min(i + size, num))))) for i in range(0, num, size)]
+
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        if shared is None:
+            # terminating may wait on a busy thread, so keep that off the event loop
+            loop.run_in_executor(None, pool.terminate)
+        raise
+
+    if shared is None:
+        if abandoned[0]:
+            loop.run_in_executor(None, pool.terminate)
+        else:
+            pool.close()
+            await loop.run_in_executor(None, pool.join)
+
+    merged = {}
+    for r in results:
+        merged.update(r)
+    return [merged[i] for i in range(num)]
+
+
 def farmworker(fn, *args, **kwargs):
     try:
         return fn(*args, **kwargs)
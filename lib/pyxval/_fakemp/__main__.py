@@ -0,0 +1,21 @@
+from __future__ import division, print_function
+
+import argparse
+
+from . import serve
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='serve tasks from a ManagerPool on this host')
+    parser.add_argument('address', help='host:port of the ManagerPool')
+    parser.add_argument('-p', '--processes', type=int, default=None, help='number of worker processes (default: cpu count)')
+    parser.add_argument('-t', '--threads', type=int, default=None, help='BLAS/OpenMP threads per worker (default: cpu count / processes)')
+    parser.add_argument('--patience', type=float, default=60, help='seconds to keep trying to reach the pool (default: 60)')
+    ns = parser.parse_args(args)
+    host, port = ns.address.rsplit(':', 1)
+    # the key is taken from the PYXVAL_AUTHKEY environment variable
+    serve((host, int(port)), processes=ns.processes, threads=ns.threads, patience=ns.patience)
+
+
+if __name__ == '__main__':
+    main()
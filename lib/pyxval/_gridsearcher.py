@@ -24,35 +24,260 @@ from __future__ import division, print_function
 
 import logging, sys
 
-from copy import deepcopy
+from copy import copy, deepcopy
+from functools import cmp_to_key
 from types import FunctionType, MethodType
 
 import numpy as np
 
+from multiprocessing import cpu_count
+
 try:
-    from fakemp import farmout, farmworker
+    from fakemp import afarmout, farmworker
 except ImportError:
-    from ._fakemp import farmout, farmworker
+    from ._fakemp import afarmout, farmworker
+
+from ._bayes import bayes
+from ._cache import ResultCache, datakey, valuekey
+from ._checkpoint import checkpoint as _checkpoint, iresumed
 
+from ._crossvalidator import CrossValidator, _arrange, _checkextra, _extra, _isfold, _isfolds, _nrows, _partition, _rows, _take
 from ._logging import PYXVAL_LOGGER
 from ._proxyclassifierfactory import ProxyClassifierFactory, is_proxy
+from ._racing import Race
+from ._sampling import isdistribution, points, value
+from ._shareddata import attach, fingerprint, release, share
 from ._validationresult import ValidationResult
 
 
 __all__ = ['GridSearcher']
 
 
-def _gridsearcher(i, paramlists, itervars, validator, kwargs, x, y):
+def _combination(i, paramlists, itervars, kwargs):
     kwargs.update([(paramlists[j][0], paramlists[j][1][int(i / den) % l]) for j, l, den in itervars])
+    return kwargs
+
+
+def _sampled(i, paramlists, points, kwargs):
+    kwargs.update([(k, value(v, points[i, j])) for j, (k, v) in enumerate(paramlists)])
+    return kwargs
+
+
+def _model(classifier):
+    # the `extra' that keeps the fitted classifier of every fold
+    return classifier
+
+
+class _Ensemble(object):
+    '''
+    Predicts with the average of the predictions of the fitted classifiers of every fold.
+    '''
+
+    def __init__(self, models):
+        self.models = models
+
+    def predict(self, x):
+        return np.mean([np.asarray(m.predict(x), dtype=float) for m in self.models], axis=0)
+
+    def weights(self):
+        return np.mean([np.asarray(m.weights(), dtype=float) for m in self.models], axis=0)
+
+
+def _gridsearcher(i, validator, kwargs, x, y, extra=None):
+    x, y = attach(x), attach(y)
     log = logging.getLogger(PYXVAL_LOGGER)
     log.debug('validating combination (%d) with args: %s' % (i + 1, str(kwargs)))
     # disable parallelization here, if it's enabled it will be done over this function
-    r = validator.validate(x, y, classifier_kwargs=kwargs, parallel=False)
+    r = validator.validate(x, y, classifier_kwargs=kwargs, extra=extra, parallel=False)
     log.debug('combination (%d) performance stats: %s' % (i + 1, r.stats))
     r.kwargs = kwargs
     return r
 
 
+def _flattenable(validator):
+    # only plain cross-validation can be broken up into individual folds
+    return isinstance(validator, CrossValidator) and type(validator).validate is CrossValidator.validate
+
+
+def _flattened(validator, x):
+    # whether validating x is broken up into individual folds, which a single-fit
+    # leave-one-out, or a tree of incremental updates, is already not
+    return _flattenable(validator) and not validator._fastloo(x) and not validator._incremental()
+
+
+def _better(r, i, best, besti):
+    # ties go to the earliest unit, just like max() would
+    return best is None or r > best or (not r < best and i < besti)
+
+
+# what the rungs of a search are sent for the combinations eliminated from a race
+_ELIMINATED = ValidationResult(None, None, None, error=RuntimeError('eliminated from the race'))
+
+
+def _ranked(results):
+    # the (i, result) pairs best first, ties going to the earliest unit and failures last
+    def cmp(a, b):
+        (i, r), (j, s) = a, b
+        if r.failed or s.failed:
+            return (r.failed - s.failed) or (i - j)
+        return -1 if r > s else 1 if r < s else i - j
+    return sorted(results, key=cmp_to_key(cmp))
+
+
+def _rungs(n, lo, hi, eta):
+    # how many times n candidates can be cut down to 1/eta of themselves while a
+    # budget of lo grows eta-fold without passing hi
+    s = 0
+    while eta ** (s + 1) <= n and lo * eta ** (s + 1) <= hi:
+        s += 1
+    return s
+
+
+def _scaled(hi, k, eta):
+    # the budget k rungs below hi, kept integral if hi is
+    budget = hi / eta ** k
+    return max(1, int(round(budget))) if isinstance(hi, (int, np.integer)) else budget
+
+
+def _halving(units, s, hi, eta):
+    '''
+    Successive halving of the combinations `units' over at most s+1 rungs.  Yields the
+    (units, budget) of every rung, and is sent back the (i, ValidationResult) pairs of
+    evaluating them, keeping the best 1/eta of them for the next rung and its eta-fold
+    budget.  The last rung's budget is always `hi'.
+    '''
+    s = _rungs(len(units), 1, eta ** s, eta)
+    for k in range(s, -1, -1):
+        results = yield units, _scaled(hi, k, eta)
+        units = [i for i, _ in _ranked(results)[:max(1, len(units) // eta)]]
+
+
+def _hyperband(n, lo, hi, eta, rng):
+    '''
+    Hyperband: successive halving of ever fewer combinations drawn at random from the n
+    of the grid, starting from ever larger budgets, from many starting at `lo' down to a
+    few evaluated on `hi' alone.  Yields and is sent the same as :py:func:`_halving`.
+    '''
+    smax = _rungs(float('inf'), lo, hi, eta)
+    for b in range(smax, -1, -1):
+        m = min(n, int(np.ceil((smax + 1) * eta ** b / (b + 1))))
+        units = sorted(rng.choice(n, m, replace=False).tolist())
+        yield from _halving(units, b, hi, eta)
+
+
+def _foldtasks(validator, num, unit, x, y, extra=None):
+    '''
+    Flattens every (unit, fold) pair of `num' units of work into its own task, returning
+    the task arguments for farmout.  unit(u) gives the partition and the classifier kwargs
+    for unit u.
+    '''
+    folds = validator.folds
+
+    def setup(t):
+        partition, kwargs = unit(t // folds)
+        return validator._foldtask(t % folds, partition, x, y, kwargs, extra)
+
+    return {'num': num * folds, 'setup': setup, 'worker': farmworker, 'isresult': _isfold}
+
+
+def _eliminated():
+    # stands in for the folds of combinations that have dropped out of a race
+    return None
+
+
+def _racetasks(validator, num, unit, x, y, race, extra=None):
+    '''
+    Like :py:func:`_foldtasks`, but the tasks go fold by fold rather than unit by unit, so
+    that every unit is scored on its first folds early on, and the remaining folds of the
+    units that have been eliminated from the `race' are skipped.
+    '''
+    folds = validator.folds
+
+    def setup(t):
+        f, u = divmod(t, num)
+        if race.eliminated(u):
+            return (_eliminated,)
+        partition, kwargs = unit(u)
+        return validator._foldtask(f, partition, x, y, kwargs, extra)
+
+    return {'num': num * folds, 'setup': setup, 'worker': farmworker, 'isresult': lambda r: r is None or _isfold(r)}
+
+
+def _foldscore(validator, r):
+    # the optstat of a single fold
+    stats = validator._collect([r]).stats
+    score = stats.get(stats.optstat)
+    return float(getattr(score, 'mu', score))
+
+
+def _unrace(validator, race, num, results):
+    # turn the results of the tasks from _racetasks back into those of _foldtasks,
+    # racing the units as their folds come in
+    log = logging.getLogger(PYXVAL_LOGGER)
+    folds = validator.folds
+    for t, r in results:
+        f, u = divmod(t, num)
+        if r is None:
+            continue
+        if not _isfold(r):
+            race.withdraw(u)
+        elif not race.eliminated(u):
+            dropped = race.add(u, f, _foldscore(validator, r))
+            if len(dropped):
+                log.debug('eliminated %d combinations from the race, %d remain' % (len(dropped), race.remaining()))
+        yield u * folds + f, r
+
+
+def _chaintasks(validator, chains, partition, combination, x, y, extra=None):
+    '''
+    Like :py:func:`_foldtasks`, but every (chain, fold) pair of the `chains' of grid
+    combinations is one task, which fits the combinations of the chain in turn, each
+    warm-started from the one before it.
+    '''
+    folds = validator.folds
+
+    def setup(t):
+        c, f = divmod(t, folds)
+        return validator._chaintask(f, partition, x, y, [combination(i) for i in chains[c]], extra)
+
+    return {'num': len(chains) * folds, 'setup': setup, 'worker': farmworker, 'isresult': _isfolds}
+
+
+def _unchain(validator, chains, results):
+    # turn the results of (chain, fold) tasks back into those of (combination, fold) tasks
+    folds = validator.folds
+    for t, r in results:
+        c, f = divmod(t, folds)
+        for k, i in enumerate(chains[c]):
+            yield i * folds + f, r[k] if _isfolds(r) else r
+
+
+def _ivalidations(validator, results):
+    '''
+    Gathers the (task, result) pairs of the tasks from :py:func:`_foldtasks` back into units.
+    Yields (u, ValidationResult) as soon as every fold of unit u is finished, or (u, error)
+    if one of them failed (with failfast disabled).
+    '''
+    folds = validator.folds
+    pending = {}
+    failed = set()
+
+    for t, r in results:
+        u, f = divmod(t, folds)
+        if u in failed:
+            continue
+        if not _isfold(r):
+            failed.add(u)
+            pending.pop(u, None)
+            yield u, r
+            continue
+        results = pending.setdefault(u, [None] * folds)
+        results[f] = r
+        if all(r is not None for r in results):
+            del pending[u]
+            yield u, validator._collect(results)
+
+
 class GridSearcher(object):
 
     def __init__(self,
@@ -63,16 +288,82 @@ class GridSearcher(object):
             validator_kwargs={},
             learn_func=None,
             predict_func=None,
-            weights_func=None):
+            weights_func=None,
+            pool=None,
+            timeout=None,
+            chunksize=None,
+            failfast=True,
+            loo_func=None,
+            warm_func=None,
+            warm_axis=None,
+            update_func=None,
+            search=None,
+            budget='rows',
+            min_budget=None,
+            max_budget=None,
+            eta=3,
+            seed=None,
+            sampler=None,
+            samples=None,
+            evaluations=None,
+            race=None,
+            race_alpha=0.05,
+            race_folds=3,
+            keep_models=False,
+            final='refit'):
 
         if not is_proxy(classifier_cls):
             classifier_cls = ProxyClassifierFactory(
                     classifier_cls,
                     learn_func,
                     predict_func,
-                    weights_func
+                    weights_func,
+                    loo_func,
+                    warm_func,
+                    update_func
             ).generate()
 
+        if warm_axis is not None and warm_axis not in gridsearch_kwargs:
+            raise ValueError('warm_axis must be one of the gridsearch_kwargs')
+
+        # search='halving' (successive halving) or 'hyperband' evaluates the combinations on
+        # a small budget first, keeping only the best 1/eta of them for each eta-fold larger
+        # budget, up to the full one.  The budget is either a subsample of the rows
+        # (budget='rows'), or the value of the classifier kwarg named by `budget', such as a
+        # number of iterations, from min_budget up to max_budget.
+        # search='bayes' validates only `evaluations' combinations (a fifth of them by default),
+        # a batch at a time, each batch chosen where a Gaussian process fit to the scores so
+        # far expects the greatest improvement
+        if search not in (None, 'halving', 'hyperband', 'bayes'):
+            raise ValueError('search must be one of None, \'halving\', \'hyperband\' or \'bayes\'')
+        if budget != 'rows' and max_budget is None:
+            raise ValueError('a max_budget is required unless the budget is \'rows\'')
+        if eta < 2:
+            raise ValueError('eta must be at least 2')
+
+        # a `sampler' ('random', 'lhs' or 'sobol') draws `samples' combinations rather than
+        # enumerating the whole grid, so gridsearch_kwargs may hold continuous ranges too
+        # (see Uniform and LogUniform) besides lists of values
+        if sampler is None and any(isdistribution(v) for v in gridsearch_kwargs.values()):
+            raise ValueError('gridsearch_kwargs holding distributions require a sampler')
+        if sampler is not None and samples is None:
+            raise ValueError('a sampler requires a number of samples')
+        if sampler is not None and warm_axis is not None:
+            raise ValueError('warm_axis requires the full grid, not a sampler')
+
+        # race='ttest' or 'frace' stops validating combinations as soon as their first
+        # race_folds or more folds show them to be significantly (at race_alpha) worse than
+        # the best so far, see Race.  Racing combinations are never yielded by igridsearch.
+        if race not in (None, 'ttest', 'frace'):
+            raise ValueError('race must be one of None, \'ttest\' or \'frace\'')
+
+        # keep_models keeps the fitted classifier of every fold of the best combination (as
+        # the `models' of its result), from which any `extra' is then taken rather than
+        # validating it once more.  final='ensemble' predicts with the average of those
+        # models, rather than refitting a classifier on all of the data ('refit').
+        if final not in ('refit', 'ensemble'):
+            raise ValueError('final must be one of \'refit\' or \'ensemble\'')
+
         if 'classifier_cls' not in validator_kwargs:
             validator_kwargs['classifier_cls'] = classifier_cls
             if 'learn_func' not in validator_kwargs:
@@ -81,21 +372,52 @@ class GridSearcher(object):
                 validator_kwargs['predict_func'] = predict_func
             if 'weights_func' not in validator_kwargs:
                 validator_kwargs['weights_func'] = weights_func
+            if 'loo_func' not in validator_kwargs and loo_func is not None:
+                validator_kwargs['loo_func'] = loo_func
+            if 'warm_func' not in validator_kwargs and warm_func is not None:
+                validator_kwargs['warm_func'] = warm_func
+            if 'update_func' not in validator_kwargs and update_func is not None:
+                validator_kwargs['update_func'] = update_func
 
         self.validator = validator_cls(**validator_kwargs)
         self.gridsearch_kwargs = gridsearch_kwargs
         self.classifier_cls = classifier_cls
         self.classifier_kwargs = classifier_kwargs
         self.classifier = None
+        self.pool = pool
+        self.timeout = timeout
+        self.chunksize = chunksize
+        self.failfast = failfast
+        self.warm_axis = warm_axis
+        self.search = search
+        self.budget = budget
+        self.min_budget = min_budget
+        self.max_budget = max_budget
+        self.eta = eta
+        self.seed = seed
+        self.sampler = sampler
+        self.evaluations = evaluations
+        self.race = race
+        self.race_alpha = race_alpha
+        self.race_folds = race_folds
+        self.keep_models = keep_models or final == 'ensemble'
+        self.final = final
+        # drawn once so that every search validates the same combinations
+        self.points = points(sampler, samples, len(gridsearch_kwargs), seed) if sampler is not None else None
         self.__computed = False
 
-    def gridsearch(self, x, y, classifier_kwargs={}, extra=None, parallel=True):
-        if extra is not None:
-            if not isinstance(extra, (str, FunctionType, MethodType)):
-                raise ValueError('the `extra\' argument takes either a string or a function.')
-
+    def _grid(self):
+        '''
+        Returns the number of combinations in the grid, and a function giving the
+        classifier kwargs of the i-th combination.  With a `sampler', the grid is made
+        up of the sampled combinations alone.
+        '''
         kwargs = deepcopy(self.classifier_kwargs)
 
+        if self.points is not None:
+            paramlists = list(self.gridsearch_kwargs.items())
+            return len(self.points), lambda i: _sampled(i, paramlists, self.points, deepcopy(kwargs))
+
         # this is tricky so try to follow...
         # define list L as the lengths of the parameter lists in gridsearch_kwargs
         # define K as the number of total dimensions to the grid_search
@@ -118,40 +440,432 @@ class GridSearcher(object):
         assert(len(cumprod_lens) == len(paramlist_lens))
         itervars = [(i, paramlist_lens[i], cumprod_lens[i]) for i in range(len(cumprod_lens))]
 
+        return totaldim, lambda i: _combination(i, paramlists, itervars, deepcopy(kwargs))
+
+    def _coordinates(self):
+        '''
+        Returns the combinations of the grid as points of the unit cube, each list of values
+        spread evenly along its own axis, or the sampled points if there's a `sampler'.
+        '''
+        if self.points is not None:
+            return self.points
+        lens = np.array([len(v) for v in self.gridsearch_kwargs.values()], dtype=int)
+        # see _grid(), parameter j advances once every prod(lens[:j]) combinations
+        dens = np.cumprod(np.concatenate(([1], lens[:-1])))
+        i = np.arange(int(np.prod(lens)))[:, None]
+        return ((i // dens) % lens + 0.5) / lens
+
+    def _chains(self):
+        '''
+        Splits the grid into chains of combinations that walk `warm_axis' in order, every
+        other parameter being held fixed, returning the indices of their combinations.
+        '''
+        names = list(self.gridsearch_kwargs.keys())
+        lens = [len(v) for v in self.gridsearch_kwargs.values()]
+        j = names.index(self.warm_axis)
+        # see _grid(), parameter j advances once every `stride' combinations
+        stride = int(np.prod(lens[:j], dtype=int))
+        n = lens[j]
+        total = int(np.prod(lens, dtype=int))
+        return [[c % stride + (c // stride) * stride * n + v * stride for v in range(n)] for c in range(total // n)]
+
+    def __farmargs(self, x, y, parallel, units=None, rows=None, budget_kwargs={}, racing=True, checkpoint=None, section=None):
+        totaldim, grid = GridSearcher._grid(self)
+        if units is None:
+            units = range(totaldim)
+        # the task for unit u validates combination units[u]
+        combination = lambda u: dict(grid(units[u]), **budget_kwargs)
+
+        log = logging.getLogger(PYXVAL_LOGGER)
+        log.debug('beginning grid search over %d variables (%d combinations)' % (len(self.gridsearch_kwargs), len(units)))
+
+        farmargs = {
+            'attempts': 3,
+            'pickletest': self if parallel else False,
+            'backend': parallel if isinstance(parallel, str) else None,
+            'pool': self.pool,
+            'timeout': self.timeout,
+            'chunksize': self.chunksize,
+            'failfast': self.failfast
+        }
+
+        x, y = _rows(x), _rows(y)
+        if rows is not None:
+            x, y = _take(attach(x), rows), _take(attach(y), rows)
+        shared = ()
+        # a single-fit leave-one-out, or a tree of incremental updates, is already one task per combination
+        flattened = _flattened(self.validator, x)
+        if flattened:
+            # every (combination, fold) pair is its own task, all of them sharing one partition
+            # so that the combinations are compared on exactly the same folds
+            partition = _partition(_nrows(x), self.validator.folds, self.validator.seed)
+            if checkpoint is not None:
+                # a resumed search must use the folds it started with
+                partition = checkpoint.state(('partition', section), lambda: partition)
+            partition = partition.share(self.pool)
+            shared += (partition.order,)
+            if self.validator.contiguous:
+                partition, x, y = _arrange(partition, x, y)
+
+        # ndarrays are published to memory-mapped files once rather than pickled into every task
+        # the caller is responsible for release()ing them
+        sx, sy = share(x, self.pool), share(y, self.pool)
+        shared += (sx, sy)
+
+        # regroup() turns the (task, result) pairs back into (unit, result) pairs
+        validator = self.validator
+        extra = _model if self.keep_models else None
+        if flattened and len(units) == totaldim and self.warm_axis is not None and getattr(validator.classifier_cls, 'warm', None) is not None:
+            # each fold walks the warm axis in order, so that every fit starts from its neighbour's
+            chains = GridSearcher._chains(self)
+            farmargs.update(_chaintasks(validator, chains, partition, combination, sx, sy, extra))
+            regroup = lambda results: _ivalidations(validator, _unchain(validator, chains, results))
+        elif flattened and racing and self.race is not None:
+            race = Race(len(units), validator.folds, self.race, self.race_alpha, self.race_folds)
+            farmargs.update(_racetasks(validator, len(units), lambda u: (partition, combination(u)), sx, sy, race, extra))
+            # set up only as many folds as can run at once, each knowing of every elimination before it
+            farmargs['lookahead'] = 2 * GridSearcher.__workers(self, parallel) if parallel else 1
+            regroup = lambda results: _ivalidations(validator, _unrace(validator, race, len(units), results))
+        elif flattened:
+            farmargs.update(_foldtasks(validator, len(units), lambda u: (partition, combination(u)), sx, sy, extra))
+            regroup = lambda results: _ivalidations(validator, results)
+        else:
+            regroup = lambda results: results
+            if getattr(validator, 'cache', None) is not None:
+                # the results are cached here, so the workers needn't digest the data again
+                validator = copy(validator)
+                validator.cache = None
+            farmargs.update({
+                'num': len(units),
+                'setup': lambda u: (_gridsearcher, units[u], validator, combination(u), sx, sy, extra),
+                'worker': farmworker,
+                'isresult': lambda r: isinstance(r, ValidationResult)
+            })
+
+        return shared, units, combination, regroup, farmargs
+
+    def __combinations(self, units, combination, regroup, results):
         log = logging.getLogger(PYXVAL_LOGGER)
-        log.debug('beginning grid search over %d variables (%d combinations)' % (len(paramlists), totaldim))
-
-        results = farmout(
-            num=totaldim,
-            setup=lambda i: (_gridsearcher, i, paramlists, itervars, self.validator, deepcopy(kwargs), x, y),
-            worker=farmworker,
-            isresult=lambda r: isinstance(r, ValidationResult),
-            attempts=3,
-            pickletest=self if parallel else False
+
+        for u, r in regroup(results):
+            # with failfast disabled, record failed combinations rather than losing everything else
+            if not isinstance(r, ValidationResult):
+                log.warning('combination (%d) failed: %s' % (units[u] + 1, repr(r)))
+                r = ValidationResult(None, None, None, error=r)
+            elif self.keep_models:
+                r.models, r.extra = r.extra, None
+            r.kwargs = combination(u)
+            yield units[u], r
+
+    def __lookup(self, x, y, units=None, rows=None, budget_kwargs={}):
+        '''
+        Looks the combinations `units' up in the validator's `cache', returning a function
+        that stores the result of a combination, the (i, ValidationResult) pairs found, and
+        the combinations that are still to be validated.
+        '''
+        cacher = self.validator._cacher(x, y, rows) if hasattr(self.validator, '_cacher') else None
+        if cacher is None:
+            return None, [], units
+
+        totaldim, grid = GridSearcher._grid(self)
+        # warm-started results depend on the walk along the warm axis, and mustn't be served
+        # to (or by) a validation from scratch
+        warm = None
+        if self.warm_axis is not None and getattr(self.validator.classifier_cls, 'warm', None) is not None:
+            warm = (self.warm_axis, valuekey(list(self.gridsearch_kwargs[self.warm_axis]), strict=False))
+        keys, hits, misses = {}, [], []
+        for i in (range(totaldim) if units is None else units):
+            kwargs = dict(grid(i), **budget_kwargs)
+            key = cacher(kwargs)
+            if key is not None and warm is not None:
+                key = ResultCache.key(key, warm)
+            r = self.validator.cache.get(key) if key is not None else None
+            if r is None:
+                keys[i] = key
+                misses.append(i)
+            else:
+                r.kwargs = kwargs
+                hits.append((i, r))
+
+        logging.getLogger(PYXVAL_LOGGER).debug('found %d of %d combinations in the cache' % (len(hits), len(hits) + len(misses)))
+
+        def store(i, r):
+            if not r.failed and keys[i] is not None:
+                # the fitted models are far too big to keep around in the cache
+                self.validator.cache.put(keys[i], r if r.models is None else ValidationResult(r.learn, r.stats, r.extra, r.kwargs))
+
+        return store, hits, misses
+
+    def __icombinations(self, x, y, parallel, units=None, rows=None, budget_kwargs={}, checkpoint=None):
+        store, hits, units = GridSearcher.__lookup(self, x, y, units, rows, budget_kwargs)
+        for i, r in hits:
+            yield i, r
+        if units is not None and not len(units):
+            return
+
+        # the tasks of a checkpoint are kept apart by what they validate
+        section = ResultCache.key(None if units is None else list(units), None if rows is None else fingerprint(rows), valuekey(budget_kwargs, strict=False))
+        shared, units, combination, regroup, farmargs = GridSearcher.__farmargs(self, x, y, parallel, units, rows, budget_kwargs, True, checkpoint, section)
+
+        try:
+            for i, r in GridSearcher.__combinations(self, units, combination, regroup, iresumed(checkpoint, section, farmargs)):
+                if store is not None:
+                    store(i, r)
+                yield i, r
+        finally:
+            release(*shared)
+
+    async def __acombinations(self, x, y, parallel, units=None, rows=None, budget_kwargs={}):
+        store, hits, units = GridSearcher.__lookup(self, x, y, units, rows, budget_kwargs)
+        if units is not None and not len(units):
+            return hits
+
+        # folds only come back once they're all finished, too late to race
+        shared, units, combination, regroup, farmargs = GridSearcher.__farmargs(self, x, y, parallel, units, rows, budget_kwargs, racing=False)
+
+        try:
+            results = enumerate(await afarmout(**farmargs))
+        finally:
+            release(*shared)
+
+        results = list(GridSearcher.__combinations(self, units, combination, regroup, results))
+        if store is not None:
+            for i, r in results:
+                store(i, r)
+        return hits + results
+
+    def __rungs(self, x, parallel, checkpoint=None):
+        '''
+        Returns the rungs of the `search' (see :py:func:`_halving`), the full budget, and
+        the order in which rows are subsampled, the first b of them making up a budget of b.
+        '''
+        totaldim, _ = GridSearcher._grid(self)
+        rng = np.random.default_rng(self.seed)
+        if checkpoint is not None:
+            # a resumed search replays the same draws
+            rng.bit_generator.state = checkpoint.state('rng', lambda: rng.bit_generator.state)
+        order = None
+        if self.budget == 'rows':
+            hi = _nrows(_rows(x))
+            # at least a couple of rows for every fold
+            lo = self.min_budget or min(hi, max(_scaled(hi, 3, self.eta), 2 * getattr(self.validator, 'folds', 1)))
+            order = rng.permutation(hi)
+        else:
+            hi = self.max_budget
+            lo = self.min_budget or _scaled(hi, 3, self.eta)
+        if self.search == 'hyperband':
+            rungs = _hyperband(totaldim, lo, hi, self.eta, rng)
+        elif self.search == 'bayes':
+            # enough combinations at a time that their folds keep every worker busy
+            workers = GridSearcher.__workers(self, parallel)
+            batch = -(-workers // getattr(self.validator, 'folds', 1))
+            evaluations = self.evaluations or -(-totaldim // 5)
+            rungs = bayes(GridSearcher._coordinates(self), evaluations, batch, hi, rng)
+        else:
+            rungs = _halving(list(range(totaldim)), _rungs(float('inf'), lo, hi, self.eta), hi, self.eta)
+        return rungs, hi, order
+
+    def __workers(self, parallel):
+        return (getattr(self.pool, 'processes', None) or cpu_count()) if parallel else 1
+
+    def __budget(self, budget, hi, order):
+        # the rows and the classifier kwargs making up a budget
+        if self.budget != 'rows':
+            return None, {self.budget: budget}
+        return (None if budget >= hi else np.sort(order[:budget])), {}
+
+    def _signature(self, x, y):
+        '''
+        Identifies a search by its data, its validator, every combination of its grid and
+        how they're searched, so that a checkpoint isn't resumed by another.
+        '''
+        if hasattr(self.validator, '_digest'):
+            digest = self.validator._digest(x, y)
+        else:
+            digest = (datakey(_rows(x)), datakey(_rows(y)))
+        totaldim, combination = GridSearcher._grid(self)
+        return ResultCache.key(
+            digest,
+            [valuekey(combination(i), strict=False) for i in range(totaldim)],
+            repr((self.search, self.budget, self.min_budget, self.max_budget, self.eta, self.seed, self.evaluations)),
+            repr((self.race, self.race_alpha, self.race_folds, self.warm_axis))
         )
 
-        best = max(results)
+    def __isearch(self, x, y, parallel, resume=None):
+        '''
+        Yields the (i, ValidationResult) of every combination the `search' evaluates on the full budget.
+        '''
+        checkpoint = _checkpoint(resume)
+        if checkpoint is not None:
+            if self.points is not None:
+                # the combinations sampled when the search started
+                self.points = checkpoint.state('points', lambda: self.points)
+            checkpoint.check(GridSearcher._signature(self, x, y))
+
+        if self.search is None:
+            for i, r in GridSearcher.__icombinations(self, x, y, parallel, checkpoint=checkpoint):
+                yield i, r
+            return
+
+        log = logging.getLogger(PYXVAL_LOGGER)
+        rungs, hi, order = GridSearcher.__rungs(self, x, parallel, checkpoint)
+        # hyperband's brackets meet again on the same budgets, which need only be evaluated once
+        evaluated = {}
+        results = None
+        while True:
+            try:
+                units, budget = rungs.send(results)
+            except StopIteration:
+                return
+            log.debug('%s search: %d combinations on a budget of %s' % (self.search, len(units), budget))
+            todo = [i for i in units if (i, budget) not in evaluated]
+            if todo:
+                rows, budget_kwargs = GridSearcher.__budget(self, budget, hi, order)
+                for i, r in GridSearcher.__icombinations(self, x, y, parallel, todo, rows, budget_kwargs, checkpoint):
+                    evaluated[i, budget] = r
+                    if budget == hi:
+                        yield i, r
+                    else:
+                        # only the models fit on the full budget are ever used
+                        r.models = None
+                for i in todo:
+                    evaluated.setdefault((i, budget), _ELIMINATED)
+            results = [(i, evaluated[i, budget]) for i in units]
+
+    async def __asearch(self, x, y, parallel):
+        # the asyncio counterpart to __isearch, returning every result at once
+        if self.search is None:
+            return await GridSearcher.__acombinations(self, x, y, parallel)
+
+        rungs, hi, order = GridSearcher.__rungs(self, x, parallel)
+        evaluated, final = {}, []
+        results = None
+        while True:
+            try:
+                units, budget = rungs.send(results)
+            except StopIteration:
+                return final
+            todo = [i for i in units if (i, budget) not in evaluated]
+            if todo:
+                for i, r in await GridSearcher.__acombinations(self, x, y, parallel, todo, *GridSearcher.__budget(self, budget, hi, order)):
+                    evaluated[i, budget] = r
+                    if budget == hi:
+                        final.append((i, r))
+                    else:
+                        r.models = None
+            results = [(i, evaluated[i, budget]) for i in units]
+
+    def __best(self, combinations):
+        log = logging.getLogger(PYXVAL_LOGGER)
+
+        # keep only the best so far, ties going to the earliest combination like max() would
+        best, besti, error = None, None, None
+        for i, r in combinations:
+            if r.failed:
+                if error is None:
+                    error = r.error
+            elif _better(r, i, best, besti):
+                if best is not None:
+                    best.models = None
+                best, besti = r, i
+                log.debug('best so far, args: %s give stats: %s' % (best.kwargs, best.stats))
+            else:
+                # only the models of the best combination are kept
+                r.models = None
+
+        if best is None:
+            raise error if isinstance(error, Exception) else RuntimeError('every grid search combination failed')
 
         log.debug('finished grid search, best args: %s give stats: %s' % (best.kwargs, best.stats))
 
-        # do this one more time if we get an extra
-        best.extra = self.validator.validate(self, x, y, classifier_kwargs=best.kwargs, extra=extra).extra if extra is not None else None
+        return best
+
+    def __extras(self, models, extra):
+        # the extras of the kept fold models, gathered just like CrossValidator._collect does
+        extra = _checkextra(extra, self.classifier_cls)
+        extras = [_extra(m, extra) for m in models]
+        return [e for e in extras if e is not None] or None
+
+    def igridsearch(self, x, y, parallel=True, resume=None):
+        '''
+        Yields the :py:class:`ValidationResult` of each combination of the grid as soon as
+        it is finished, in no particular order.  Failed combinations (see `failfast') are
+        yielded too, with their `error' set.  With a `search', only the combinations that
+        make it to the full budget are.  See :py:meth:`gridsearch` for `resume'.
+        '''
+        for _, r in GridSearcher.__isearch(self, x, y, parallel, resume):
+            yield r
+
+    def gridsearch(self, x, y, classifier_kwargs={}, extra=None, parallel=True, resume=None):
+        '''
+        Returns the :py:class:`ValidationResult` of the best combination of the grid, its
+        `kwargs' being those it was validated with.
+        :param resume: a :py:class:`Checkpoint`, or the path of one, to which the finished tasks are saved
+            as they come in, and from which an interrupted search picks up where it left off
+        '''
+        if extra is not None:
+            if not isinstance(extra, (str, FunctionType, MethodType)):
+                raise ValueError('the `extra\' argument takes either a string or a function.')
+
+        best = GridSearcher.__best(self, GridSearcher.__isearch(self, x, y, parallel, resume))
+
+        # do this one more time if we get an extra, unless the models of its folds were kept
+        if extra is not None and getattr(best, 'models', None) is not None:
+            best.extra = GridSearcher.__extras(self, best.models, extra)
+        else:
+            best.extra = self.validator.validate(x, y, classifier_kwargs=best.kwargs, extra=extra, parallel=parallel).extra if extra is not None else None
 
 #         print ret['kwargs']
 #         print '\n'.join([str(s) for s in ret['stats'].tolist()])
 
         return best
 
+    async def agridsearch(self, x, y, classifier_kwargs={}, extra=None, parallel=True):
+        '''
+        The asyncio counterpart to :py:meth:`gridsearch`, awaiting every task of the grid
+        concurrently without blocking the event loop.  Cancelling it abandons the search.
+        '''
+        if extra is not None:
+            if not isinstance(extra, (str, FunctionType, MethodType)):
+                raise ValueError('the `extra\' argument takes either a string or a function.')
+
+        best = GridSearcher.__best(self, await GridSearcher.__asearch(self, x, y, parallel))
+
+        # do this one more time if we get an extra, unless the models of its folds were kept
+        if extra is not None and getattr(best, 'models', None) is not None:
+            best.extra = GridSearcher.__extras(self, best.models, extra)
+        elif extra is not None:
+            if hasattr(self.validator, 'avalidate'):
+                best.extra = (await self.validator.avalidate(x, y, classifier_kwargs=best.kwargs, extra=extra, parallel=parallel)).extra
+            else:
+                best.extra = self.validator.validate(x, y, classifier_kwargs=best.kwargs, extra=extra, parallel=parallel).extra
+        else:
+            best.extra = None
+
+        return best
+
     def learn(self, x, y):
         gsret = GridSearcher.gridsearch(self, x, y)
 
         # print 'gridsearch stats:', gsret['stats']
         # print 'optimum parameters:', gsret['kwargs']
 
-        self.classifier = self.classifier_cls(**gsret.kwargs)
-
-        # I don't like unmangling the private name, but here it is..
-        lret = self.classifier.learn(x, y)
+        return GridSearcher.refit(self, x, y, gsret)
+
+    def refit(self, x, y, gsret):
+        '''
+        Trains the classifier on all of the provided data using the kwargs of an earlier grid search result.
+        With final='ensemble', the kept fold models of the result predict in its stead, nothing being
+        trained at all, unless the result has none (it came from the cache, for instance).
+        '''
+        models = getattr(gsret, 'models', None)
+        if self.final == 'ensemble' and models:
+            self.classifier = _Ensemble(models)
+            lret = None
+        else:
+            self.classifier = self.classifier_cls(**gsret.kwargs)
+            # I don't like unmangling the private name, but here it is..
+            lret = self.classifier.learn(x, y)
 
         self.__computed = True
 
@@ -22,17 +22,37 @@
 
 from __future__ import division, print_function
 
+import logging
+
 from copy import deepcopy
 from types import FunctionType, MethodType
 
-from ._crossvalidator import CrossValidator
-from ._gridsearcher import GridSearcher
+import numpy as np
+
+try:
+    from fakemp import farmout, farmworker
+except ImportError:
+    from ._fakemp import farmout, farmworker
+
+from ._checkpoint import checkpoint as _checkpoint, iresumed, resumed
+from ._crossvalidator import CrossValidator, _checkextra, _extra, _isfold, _nrows, _partition, _rows, _split
+from ._gridsearcher import GridSearcher, _better, _flattened, _foldtasks, _ivalidations, _model
 from ._discreteperfstats import DiscretePerfStats
+from ._logging import PYXVAL_LOGGER
+from ._shareddata import attach, release, share
+from ._validationresult import ValidationResult
 
 
 __all__ = ['NestedCrossValidator']
 
 
+def _refitter(f, partition, x, y, gridsearcher, gsret, extra):
+    xin, yin, xout, yout = _split(f, partition, attach(x), attach(y))
+    l = gridsearcher.refit(xin, yin, gsret)
+    preds = gridsearcher.predict(xout)
+    return l, _extra(gridsearcher, extra), yout, preds, gridsearcher.weights()
+
+
 class NestedCrossValidator(CrossValidator):
 
     def __init__(self,
@@ -46,7 +66,12 @@ class NestedCrossValidator(CrossValidator):
             scorer_kwargs={},
             learn_func=None,
             predict_func=None,
-            weights_func=None):
+            weights_func=None,
+            pool=None,
+            seed=None,
+            keep_models=False,
+            final='refit',
+            update_func=None):
 
         FunctionTypes = (FunctionType, MethodType)
         # due to some stupidity in pickle, we need to make these strings here
@@ -56,6 +81,8 @@ class NestedCrossValidator(CrossValidator):
             predict_func = predict_func.__name__
         if isinstance(weights_func, FunctionTypes):
             weights_func = weights_func.__name__
+        if isinstance(update_func, FunctionTypes):
+            update_func = update_func.__name__
 
         gridsearcher_kwargs = {
             'classifier_cls': classifier_cls,
@@ -65,7 +92,11 @@ class NestedCrossValidator(CrossValidator):
             'validator_kwargs': { 'folds': folds-1 } if (validator_cls is None and len(validator_kwargs) == 0) else validator_kwargs,
             'learn_func': learn_func,
             'predict_func': predict_func,
-            'weights_func': weights_func
+            'weights_func': weights_func,
+            'update_func': update_func,
+            # see GridSearcher, final='ensemble' predicts every outer fold with the models of its inner folds
+            'keep_models': keep_models,
+            'final': final
         }
 
         super(NestedCrossValidator, self).__init__(
@@ -73,6 +104,102 @@ class NestedCrossValidator(CrossValidator):
                 folds,
                 gridsearcher_kwargs,
                 scorer_cls,
-                scorer_kwargs
+                scorer_kwargs,
+                pool=pool,
+                seed=seed
                 # learn_func, predict_func, and weights_func are all default in GridSearcher
         )
+
+    def validate(self, x, y, classifier_kwargs={}, extra=None, parallel=True, resume=None):
+        '''
+        Runs nested crossvalidation on the provided data, see :py:meth:`CrossValidator.validate`.
+        Every (outer fold, grid combination, inner fold) triple is farmed out as its own task,
+        after which each outer fold is refit with its best combination.  With `resume', the
+        partitions and every finished task are saved to the checkpoint as they come in.
+        '''
+        extra = _checkextra(extra, self.classifier_cls)
+
+        kwargs = deepcopy(self.classifier_kwargs)
+        kwargs.update(classifier_kwargs)
+        gridsearcher = self.classifier_cls(**kwargs)
+
+        # one generator draws every partition so that a seed reproduces all of them
+        x, y = _rows(x), _rows(y)
+        rng = np.random.default_rng(self.seed)
+        outer = _partition(_nrows(x), self.folds, rng)
+
+        # flattened only where the grid search of every outer fold would be, which for a
+        # leave-one-out depends on no more than the number of rows it sees
+        if not all(_flattened(gridsearcher.validator, outer.inpart(f)) for f in range(self.folds)):
+            return super(NestedCrossValidator, self).validate(x, y, classifier_kwargs, extra, parallel, resume)
+
+        totaldim, combination = gridsearcher._grid()
+
+        log = logging.getLogger(PYXVAL_LOGGER)
+        log.debug('beginning %d-fold nested crossvalidation (%d tasks)' % (self.folds, self.folds * totaldim * gridsearcher.validator.folds))
+
+        inner = [outer.subpartition(f, gridsearcher.validator.folds, rng) for f in range(self.folds)]
+
+        checkpoint = _checkpoint(resume)
+        if checkpoint is not None:
+            checkpoint.check(CrossValidator._signature(self, x, y, classifier_kwargs, extra))
+            # a resumed validation must use the partitions it started with
+            outer, inner = checkpoint.state('partitions', lambda: (outer, inner))
+
+        farmargs = {
+            'attempts': 3,
+            'pickletest': self if parallel else False,
+            'backend': parallel if isinstance(parallel, str) else None,
+            'pool': self.pool,
+            'timeout': self.timeout,
+            'chunksize': self.chunksize
+        }
+
+        # ndarrays are published to memory-mapped files once rather than pickled into every task
+        sx, sy = share(x, self.pool), share(y, self.pool)
+        outer = outer.share(self.pool)
+        inner = [p.share(self.pool) for p in inner]
+
+        try:
+            best = [None] * self.folds
+            besti = [None] * self.folds
+            error = None
+            tasks = _foldtasks(
+                gridsearcher.validator,
+                self.folds * totaldim,
+                lambda u: (inner[u // totaldim], combination(u % totaldim)),
+                sx, sy,
+                _model if gridsearcher.keep_models else None
+            )
+            results = iresumed(checkpoint, 'inner', dict(farmargs, failfast=gridsearcher.failfast, **tasks))
+            for u, r in _ivalidations(gridsearcher.validator, results):
+                f, i = divmod(u, totaldim)
+                if not isinstance(r, ValidationResult):
+                    log.warning('fold (%d) combination (%d) failed: %s' % (f + 1, i + 1, repr(r)))
+                    error = r if error is None else error
+                    continue
+                r.kwargs = combination(i)
+                if gridsearcher.keep_models:
+                    r.models, r.extra = r.extra, None
+                if _better(r, i, best[f], besti[f]):
+                    best[f], besti[f] = r, i
+
+            if any(b is None for b in best):
+                raise error if isinstance(error, Exception) else RuntimeError('every grid search combination failed')
+
+            refits = dict(
+                num=self.folds,
+                setup=lambda f: (_refitter, f, outer, sx, sy, gridsearcher, best[f], extra),
+                worker=farmworker,
+                isresult=_isfold,
+                **farmargs
+            )
+            results = farmout(**refits) if checkpoint is None else resumed(checkpoint, 'refit', refits)
+        finally:
+            release(sx, sy, outer.order, *[p.order for p in inner])
+
+        ret = CrossValidator._collect(self, results)
+
+        log.debug('finished %d-fold nested crossvalidation, performance stats: %s' % (self.folds, ret.stats))
+
+        return ret
@@ -68,6 +68,11 @@ class NormalValue(list):
         super(NormalValue, self).extend(values)
         NormalValue.__compute(self)
 
+    # list subclasses are unpickled by extend()ing before __dict__ is restored,
+    # which trips the dtype checks above, so rebuild through __init__ instead
+    def __reduce__(self):
+        return NormalValue, (self.__dtype, list(self), self.name if hasattr(self, 'name') else None)
+
     def __compute(self):
         if len(self) == 0:
             self.mu = 0.
@@ -0,0 +1,120 @@
+# pyxval :: (Python CROSS-VALidation) A Python library containing some useful
+# machine learning interfaces and utilities for supervised learning and 
+# prediction (including cross-validation, grid-search, and performance
+# statistics) 
+# 
+# Copyright (C) 2011 N Lance Hepler <nlhepler@gmail.com> 
+# Copyright (C) 2011 Brent Payne <brent.payne@gmail.com> 
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+from __future__ import division, print_function
+
+import numpy as np
+
+from ._shareddata import attach, share
+
+
+__all__ = ['Partition', 'partition']
+
+
+def _labeltype(folds):
+    # the smallest signed type holding every label from -1 to folds-1, plus one
+    return np.min_scalar_type(-(folds + 1))
+
+
+def _indextype(n):
+    return np.int32 if n < np.iinfo(np.int32).max else np.int64
+
+
+class Partition(object):
+    '''
+    The assignment of n rows to folds.  The rows are kept sorted by fold (`order'),
+    along with where each fold starts within them (`offsets'), so that the rows of any
+    fold are a slice of `order'.  Rows labelled -1 take part in no fold at all.
+    :param labels: the fold, from -1 to folds-1, of each row
+    :param folds: the number of folds
+    '''
+
+    def __init__(self, labels, folds, order=None, offsets=None):
+        self.folds = folds
+        if offsets is None:
+            labels = np.asarray(labels, dtype=_labeltype(folds))
+            # a stable sort keeps the rows of every fold in their original order
+            order = np.argsort(labels, kind='stable').astype(_indextype(len(labels)), copy=False)
+            offsets = np.zeros(folds + 2, dtype=np.int64)
+            np.cumsum(np.bincount(labels + 1, minlength=folds + 1), out=offsets[1:])
+        self.order = order
+        self.offsets = offsets
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __order(self):
+        # an arranged partition's rows are already in fold order
+        return np.arange(len(self), dtype=_indextype(len(self))) if self.order is None else attach(self.order)
+
+    def outpart(self, f):
+        '''
+        The rows of fold f.
+        '''
+        return self.__order()[self.offsets[f + 1]:self.offsets[f + 2]]
+
+    def inpart(self, f):
+        '''
+        The rows of every fold other than f.
+        '''
+        order = self.__order()
+        return np.concatenate((order[self.offsets[1]:self.offsets[f + 1]], order[self.offsets[f + 2]:]))
+
+    def arranged(self):
+        '''
+        The partition of the same rows once they are put in fold order (see `order'), in
+        which every fold is a contiguous slice.  Its `order' is None.
+        '''
+        return Partition(None, self.folds, None, self.offsets)
+
+    def subpartition(self, f, folds, seed=None):
+        '''
+        Partitions the rows outside of fold f into `folds' folds of their own,
+        the rows of fold f taking part in none of them.
+        '''
+        rows = np.sort(self.inpart(f))
+        labels = np.full(len(self), -1, dtype=_labeltype(folds))
+        labels[rows] = _labels(len(rows), folds, seed)
+        return Partition(labels, folds)
+
+    def share(self, pool=None):
+        '''
+        Returns a copy whose row order is published with :py:func:`share`, the caller
+        is responsible for release()ing its `order'.
+        '''
+        return Partition(None, self.folds, share(self.order, pool), self.offsets)
+
+
+def _labels(n, folds, seed=None):
+    # n // folds rows for every fold, and one more for the first n % folds of them,
+    # scattered through a permutation as shuffling small integer types in place is slow
+    labels = np.empty(n, dtype=_labeltype(folds))
+    labels[np.random.default_rng(seed).permutation(n)] = np.resize(np.arange(folds, dtype=labels.dtype), n)
+    return labels
+
+
+def partition(n, folds, seed=None):
+    '''
+    Randomly assigns n rows to `folds' folds of (nearly) equal size.
+    :param seed: anything np.random.default_rng accepts, including a Generator
+    '''
+    return Partition(_labels(n, folds, seed), folds)
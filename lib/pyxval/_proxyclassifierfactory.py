@@ -24,6 +24,8 @@ from __future__ import division, print_function
 
 import types
 
+from inspect import getattr_static
+
 from six.moves import copyreg
 
 
@@ -39,31 +41,43 @@ class _dynamic_proxy_class(type):
         return _create_proxy, self._reduce_args
 
 
-def _create_proxy(classifier_cls, learn_func, predict_func, weights_func):
+# methods a classifier may go without, which are None on its proxy when missing
+_optional_funcs = ('loo', 'warm')
+
+
+def _create_proxy(classifier_cls, learn_func, predict_func, weights_func, loo_func=None, warm_func=None, update_func=None):
     proxy_class = _dynamic_proxy_class(
             _proxy_hdr + classifier_cls.__name__,
             (classifier_cls,),
-            { '_reduce_args': (classifier_cls, learn_func, predict_func, weights_func) }
+            {
+                '_reduce_args': (classifier_cls, learn_func, predict_func, weights_func, loo_func, warm_func, update_func),
+                # the name of the incremental update asked for, if any, which is left under its own
+                # name as an `update' of the classifier may well mean something else
+                '_update_func': update_func
+            }
     )
 
     proxy_methods = [
             ('learn', learn_func),
             ('predict', predict_func),
-            ('weights', weights_func)
+            ('weights', weights_func),
+            ('loo', loo_func),
+            ('warm', warm_func)
     ]
     for proxy_func, real_func in proxy_methods:
         if proxy_func == real_func:
             continue
 
-        if real_func is None:
-            method = lambda: None
+        if real_func is None and proxy_func in _optional_funcs:
+            # mark a missing optional method so that callers can tell
+            setattr(proxy_class, proxy_func, None)
+            continue
+        elif real_func is None:
+            method = staticmethod(lambda: None)
         else:
-            method = getattr(classifier_cls, real_func)
-
-        if hasattr(method, 'im_self') and getattr(method, 'im_self'):
-            types.MethodType(method, proxy_class)
-        elif not hasattr(method, 'im_self'):
-            method = staticmethod(method)
+            # as it was defined, so that a plain function still binds to the instance
+            # and static and class methods stay what they are
+            method = getattr_static(classifier_cls, real_func)
 
         setattr(proxy_class, proxy_func, method)
 
@@ -75,22 +89,34 @@ copyreg.pickle(_dynamic_proxy_class, _dynamic_proxy_class.__reduce__, _create_pr
 
 class ProxyClassifierFactory(object):
 
-    def __init__(self, classifier_cls, learn_func=None, predict_func=None, weights_func=None):
-        learn_func, predict_func, weights_func = \
-                ProxyClassifierFactory.__find_funcs(classifier_cls, learn_func, predict_func, weights_func)
+    def __init__(self, classifier_cls, learn_func=None, predict_func=None, weights_func=None, loo_func=None, warm_func=None, update_func=None):
+        '''
+        :param loo_func: optionally, a method that fits x and y once and returns the exact
+            leave-one-out prediction of every row, loo(x, y), looked for as `loo' by default
+        :param warm_func: optionally, a method that starts an unfitted classifier from the
+            fitted state of a neighbouring one, warm(previous), looked for as `warm' by default
+        :param update_func: optionally, a method that learns x and y on top of whatever the
+            classifier has learnt so far, update(x, y), never looked for as a method of that name
+            may well mean something else
+        '''
+        learn_func, predict_func, weights_func, loo_func, warm_func, update_func = \
+                ProxyClassifierFactory.__find_funcs(classifier_cls, learn_func, predict_func, weights_func, loo_func, warm_func, update_func)
 
         self.__proxyclass = _create_proxy(
                 classifier_cls,
                 learn_func,
                 predict_func,
-                weights_func
+                weights_func,
+                loo_func,
+                warm_func,
+                update_func
         )
 
     def generate(self):
         return self.__proxyclass
 
     @staticmethod
-    def __find_funcs(classifier_cls, learn_func, predict_func, weights_func):
+    def __find_funcs(classifier_cls, learn_func, predict_func, weights_func, loo_func, warm_func, update_func):
         classifier_cls_dir = dir(classifier_cls)
 
         # set up some default places to look for _functions
@@ -121,6 +147,33 @@ class ProxyClassifierFactory(object):
         else:
             raise ValueError('weights_func has an unhandled type %s' % type(weights_func))
 
+        if loo_func is None:
+            loo_func = ('loo',)
+        elif isinstance(loo_func, types.MethodType) or isinstance(loo_func, types.FunctionType):
+            loo_func = (loo_func.__name__,)
+        elif isinstance(loo_func, str):
+            loo_func = (loo_func,)
+        else:
+            raise ValueError('loo_func has an unhandled type %s' % type(loo_func))
+
+        if warm_func is None:
+            warm_func = ('warm',)
+        elif isinstance(warm_func, types.MethodType) or isinstance(warm_func, types.FunctionType):
+            warm_func = (warm_func.__name__,)
+        elif isinstance(warm_func, str):
+            warm_func = (warm_func,)
+        else:
+            raise ValueError('warm_func has an unhandled type %s' % type(warm_func))
+
+        if update_func is None or update_func is False:
+            update_func = ()
+        elif isinstance(update_func, types.MethodType) or isinstance(update_func, types.FunctionType):
+            update_func = (update_func.__name__,)
+        elif isinstance(update_func, str):
+            update_func = (update_func,)
+        else:
+            raise ValueError('update_func has an unhandled type %s' % type(update_func))
+
         # look for these _functions
         lf = None
         for m in learn_func:
@@ -146,4 +199,27 @@ class ProxyClassifierFactory(object):
                     wf = m
                     break
 
-        return lf, pf, wf
+        # nor if there's no leave-one-out shortcut
+        of = None
+        for m in loo_func:
+            if m in classifier_cls_dir:
+                of = m
+                break
+
+        # nor a warm start
+        sf = None
+        for m in warm_func:
+            if m in classifier_cls_dir:
+                sf = m
+                break
+
+        # incremental updates are only ever asked for, so they had better be there
+        uf = None
+        for m in update_func:
+            if m in classifier_cls_dir:
+                uf = m
+                break
+        if len(update_func) and uf is None:
+            raise ValueError('No update method `%s\' in base class `%s\'' % (update_func[0], repr(classifier_cls)))
+
+        return lf, pf, wf, of, sf, uf
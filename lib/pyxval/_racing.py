@@ -0,0 +1,173 @@
+# pyxval :: (Python CROSS-VALidation) A Python library containing some useful
+# machine learning interfaces and utilities for supervised learning and 
+# prediction (including cross-validation, grid-search, and performance
+# statistics) 
+# 
+# Copyright (C) 2011 N Lance Hepler <nlhepler@gmail.com> 
+# Copyright (C) 2011 Brent Payne <brent.payne@gmail.com> 
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+from __future__ import division, print_function
+
+from math import erfc, pi
+
+import numpy as np
+
+
+__all__ = ['Race']
+
+
+def _tsf(t, df):
+    '''
+    The survival function P(T > t) of Student's t distribution with integer `df', for an
+    array of t, using the closed forms of Abramowitz and Stegun 26.7.3 and 26.7.4.
+    '''
+    t = np.asarray(t, dtype=float)
+    theta = np.arctan(t / np.sqrt(df))
+    s, c = np.sin(theta), np.cos(theta)
+    # the series of cos^2 theta powers in A(t|df) = P(|T| < |t|)
+    if df % 2 == 0:
+        term = total = np.ones_like(t)
+        for k in range(2, df, 2):
+            term = term * c ** 2 * (k - 1) / k
+            total = total + term
+        a = s * total
+    else:
+        term = c
+        total = c if df > 1 else np.zeros_like(t)
+        for k in range(3, df - 1, 2):
+            term = term * c ** 2 * (k - 1) / k
+            total = total + term
+        a = 2. / pi * (theta + s * total)
+    # a is odd in t, as theta and s are
+    return 0.5 * (1. - a)
+
+
+def _chi2sf(x, df):
+    # the survival function of the chi-squared distribution with integer `df'
+    if df % 2 == 0:
+        term = total = np.exp(-x / 2.)
+        for i in range(1, df // 2):
+            term *= x / (2. * i)
+            total += term
+        return total
+    total = erfc(np.sqrt(x / 2.))
+    term = np.sqrt(2. * x / pi) * np.exp(-x / 2.)
+    for i in range(1, (df + 1) // 2):
+        total += term
+        term *= x / (2. * i + 1.)
+    return total
+
+
+def _ranks(a):
+    # the ranks of every row along each column, 1 being the highest, ties sharing their mean rank
+    ranks = np.empty_like(a, dtype=float)
+    for j in range(a.shape[1]):
+        values, inverse, counts = np.unique(-a[:, j], return_inverse=True, return_counts=True)
+        ranks[:, j] = (np.cumsum(counts) - counts)[inverse] + (counts[inverse] + 1) / 2.
+    return ranks
+
+
+class Race(object):
+    '''
+    Races `num' candidates over `folds' folds: as the score of each of their folds comes
+    in (see :py:meth:`add`), the candidates that are significantly worse than the best
+    are eliminated, once they have been scored on at least `minfolds' folds.
+    :param test: 'ttest', a one-sided paired t-test of every candidate against the best
+        on the folds they share, or 'frace', a Friedman test over the folds every
+        remaining candidate has finished, followed by its post-hoc pairwise comparisons
+    :param alpha: the significance level of the test
+    '''
+
+    def __init__(self, num, folds, test='ttest', alpha=0.05, minfolds=3):
+        if test not in ('ttest', 'frace'):
+            raise ValueError('the test must be one of \'ttest\' or \'frace\'')
+        self.scores = np.full((num, folds), np.nan)
+        self.alive = np.ones(num, dtype=bool)
+        self.test = test
+        self.alpha = alpha
+        self.minfolds = max(2, minfolds)
+        self.__blocks = 0
+
+    def eliminated(self, u):
+        return not self.alive[u]
+
+    def remaining(self):
+        return int(self.alive.sum())
+
+    def withdraw(self, u):
+        # a candidate that failed takes no further part
+        self.alive[u] = False
+
+    def add(self, u, f, score):
+        '''
+        Records the score of candidate u on fold f, returning the candidates newly eliminated.
+        '''
+        self.scores[u, f] = score
+        if not self.alive[u]:
+            return []
+        dropped = self.__ttest() if self.test == 'ttest' else self.__frace()
+        self.alive[dropped] = False
+        return dropped.tolist()
+
+    def __ttest(self):
+        scored = ~np.isnan(self.scores)
+        counts = scored.sum(1)
+        means = np.where(counts > 0, np.nansum(self.scores, 1) / np.maximum(counts, 1), -np.inf)
+        contenders = self.alive & (counts >= self.minfolds)
+        if contenders.sum() < 2:
+            return np.array([], dtype=int)
+        b = int(np.argmax(np.where(contenders, means, -np.inf)))
+        shared = scored & scored[b]
+        n = shared.sum(1)
+        diffs = np.where(shared, self.scores[b] - np.where(shared, self.scores, 0.), 0.)
+        mean = diffs.sum(1) / np.maximum(n, 1)
+        var = ((diffs - mean[:, None]) ** 2 * shared).sum(1) / np.maximum(n - 1, 1)
+        candidates = np.flatnonzero(contenders & (n >= self.minfolds))
+        candidates = candidates[candidates != b]
+        p = np.ones(len(candidates))
+        for df in np.unique(n[candidates] - 1):
+            which = n[candidates] - 1 == df
+            c = candidates[which]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = np.where(var[c] > 0, mean[c] / np.sqrt(var[c] / n[c]), np.where(mean[c] > 0, np.inf, 0.))
+            p[which] = _tsf(t, int(df))
+        return candidates[p < self.alpha]
+
+    def __frace(self):
+        alive = np.flatnonzero(self.alive)
+        # the folds every remaining candidate has finished are the blocks of the design
+        blocks = np.flatnonzero(~np.isnan(self.scores[alive]).any(0))
+        if len(alive) < 2 or len(blocks) < self.minfolds or len(blocks) == self.__blocks:
+            return np.array([], dtype=int)
+        self.__blocks = len(blocks)
+        b, k = len(blocks), len(alive)
+        ranks = _ranks(self.scores[np.ix_(alive, blocks)])
+        sums = ranks.sum(1)
+        a = (ranks ** 2).sum()
+        c = b * k * (k + 1) ** 2 / 4.
+        if a - c <= 0:
+            return np.array([], dtype=int)
+        t = (k - 1) * ((sums - b * (k + 1) / 2.) ** 2).sum() / (a - c)
+        if _chi2sf(t, k - 1) >= self.alpha:
+            return np.array([], dtype=int)
+        # the post-hoc comparisons of Conover, against the best rank sum
+        df = (b - 1) * (k - 1)
+        se = np.sqrt(2. * b * max(1. - t / (b * (k - 1)), 0.) * (a - c) / df)
+        best = sums.min()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stat = np.where(se > 0, (sums - best) / se, np.where(sums > best, np.inf, 0.))
+        return alive[2. * _tsf(stat, df) < self.alpha]
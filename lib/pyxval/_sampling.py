@@ -0,0 +1,108 @@
+# pyxval :: (Python CROSS-VALidation) A Python library containing some useful
+# machine learning interfaces and utilities for supervised learning and 
+# prediction (including cross-validation, grid-search, and performance
+# statistics) 
+# 
+# Copyright (C) 2011 N Lance Hepler <nlhepler@gmail.com> 
+# Copyright (C) 2011 Brent Payne <brent.payne@gmail.com> 
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+from __future__ import division, print_function
+
+import numpy as np
+
+try:
+    from scipy.stats import qmc
+except ImportError:
+    qmc = None
+
+
+__all__ = ['LogUniform', 'Uniform']
+
+
+class Uniform(object):
+    '''
+    A continuous range of values for a GridSearcher to sample from, uniformly between lo
+    and hi.  Anything else with a `ppf' method (the inverse of its cumulative distribution
+    function), such as a frozen scipy.stats distribution, may be used in its place.
+    '''
+
+    def __init__(self, lo, hi):
+        if not lo < hi:
+            raise ValueError('lo must be less than hi')
+        self.lo = lo
+        self.hi = hi
+
+    def ppf(self, q):
+        return self.lo + q * (self.hi - self.lo)
+
+
+class LogUniform(Uniform):
+    '''
+    Like :py:class:`Uniform`, but uniform on a log scale, for values such as
+    regularization strengths that span several orders of magnitude.
+    '''
+
+    def __init__(self, lo, hi):
+        if not 0 < lo:
+            raise ValueError('lo must be positive')
+        super(LogUniform, self).__init__(lo, hi)
+
+    def ppf(self, q):
+        return self.lo * (self.hi / self.lo) ** q
+
+
+def isdistribution(v):
+    return hasattr(v, 'ppf')
+
+
+def _lhs(n, d, rng):
+    # one point in every n-th of each dimension, the strata being matched up at random
+    strata = np.argsort(rng.random((d, n)), axis=1).T
+    return (strata + rng.random((n, d))) / n
+
+
+def _sobol(n, d, rng):
+    if qmc is None:
+        raise RuntimeError('sobol sampling requires scipy')
+    return qmc.Sobol(d, scramble=True, seed=rng).random(n)
+
+
+_samplers = {
+    'random': lambda n, d, rng: rng.random((n, d)),
+    'lhs': _lhs,
+    'sobol': _sobol
+}
+
+
+def points(sampler, n, d, seed=None):
+    '''
+    Returns n points in the d-dimensional unit cube, drawn by the given `sampler': one
+    of 'random', 'lhs' (Latin hypercube) or 'sobol' (a scrambled Sobol sequence).
+    '''
+    if sampler not in _samplers:
+        raise ValueError('sampler must be one of %s' % ', '.join(repr(k) for k in sorted(_samplers)))
+    return _samplers[sampler](n, d, np.random.default_rng(seed))
+
+
+def value(v, q):
+    '''
+    The value at quantile q of `v', either a distribution (see :py:func:`isdistribution`)
+    or a list of values, each of which is equally likely.
+    '''
+    if isdistribution(v):
+        return v.ppf(q)
+    return v[min(int(q * len(v)), len(v) - 1)]
@@ -45,7 +45,8 @@ class SelectingGridSearcher(GridSearcher):
             validator_kwargs={},
             learn_func=None,
             predict_func=None,
-            weights_func=None):
+            weights_func=None,
+            pool=None):
 
         super(SelectingGridSearcher, self).__init__(
             classifier_cls,
@@ -55,7 +56,8 @@ class SelectingGridSearcher(GridSearcher):
             validator_kwargs,
             learn_func,
             predict_func,
-            weights_func
+            weights_func,
+            pool
         )
         self.__selected = False
         self.selector = selector_cls(**selector_kwargs)
@@ -74,10 +76,10 @@ class SelectingGridSearcher(GridSearcher):
             raise Exception('Selection hasn\'t yet been performed.')
         return self.selector.features()
 
-    def gridsearch(self, x, y, classifier_kwargs={}, extra=None):
+    def gridsearch(self, x, y, classifier_kwargs={}, extra=None, parallel=True, resume=None):
         SelectingGridSearcher.select(self, x, y)
         x = self.selector.subset(x)
-        return super(SelectingGridSearcher, self).gridsearch(x, y, classifier_kwargs=classifier_kwargs, extra=extra)
+        return super(SelectingGridSearcher, self).gridsearch(x, y, classifier_kwargs=classifier_kwargs, extra=extra, parallel=parallel, resume=resume)
 
     def learn(self, x, y):
         SelectingGridSearcher.select(self, x, y)
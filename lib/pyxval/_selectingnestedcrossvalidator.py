@@ -47,7 +47,8 @@ class SelectingNestedCrossValidator(CrossValidator):
             scorer_kwargs={},
             learn_func=None,
             predict_func=None,
-            weights_func=None):
+            weights_func=None,
+            pool=None):
 
         gridsearcher_kwargs = {
             'classifier_cls': classifier_cls,
@@ -67,6 +68,7 @@ class SelectingNestedCrossValidator(CrossValidator):
                 folds,
                 gridsearcher_kwargs,
                 scorer_cls,
-                scorer_kwargs
+                scorer_kwargs,
+                pool=pool
                 # learn_func, predict_func, and weights_func are all defaults in SelectingGridSearcher 
         )
@@ -0,0 +1,329 @@
+# pyxval :: (Python CROSS-VALidation) A Python library containing some useful
+# machine learning interfaces and utilities for supervised learning and 
+# prediction (including cross-validation, grid-search, and performance
+# statistics) 
+# 
+# Copyright (C) 2011 N Lance Hepler <nlhepler@gmail.com> 
+# Copyright (C) 2011 Brent Payne <brent.payne@gmail.com> 
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+from __future__ import division, print_function
+
+import mmap
+import os
+
+from atexit import register as atexit_register
+from collections import OrderedDict
+from hashlib import sha1
+from tempfile import gettempdir, mkstemp
+from threading import Lock
+
+import numpy as np
+
+try:
+    from scipy.sparse import issparse
+except ImportError:
+    issparse = None
+
+
+__all__ = ['MappedArray', 'SharedArray', 'SharedSparse', 'attach', 'fingerprint', 'gather', 'issparse', 'mapped', 'release', 'share']
+
+
+# arrays this (worker) process has mapped, keyed by fingerprint, most recently used last
+_attached = OrderedDict()
+
+# files this process has published, keyed by fingerprint, most recently used last,
+# each entry being [path, nbytes, number of live SharedArrays using it]
+_published = OrderedDict()
+_publock = Lock()
+
+# files this process has memory-mapped on behalf of MappedArrays, keyed by their location
+_mapped = {}
+
+
+def _budget():
+    # how many bytes of published datasets to keep around between calls, 0 disables caching
+    return int(os.getenv('PYXVAL_CACHE_BYTES', 1 << 30))
+
+
+def _sharedir():
+    # prefer a memory-backed filesystem so nothing ever touches the disk
+    d = os.getenv('PYXVAL_SHMDIR', '/dev/shm')
+    return d if os.path.isdir(d) and os.access(d, os.W_OK) else gettempdir()
+
+
+def fingerprint(arr):
+    '''
+    Returns a hex digest identifying the contents (dtype, shape and data) of an ndarray.
+    '''
+    arr = np.ascontiguousarray(arr)
+    h = sha1(('%s%s' % (arr.dtype.str, arr.shape)).encode('ascii'))
+    h.update(arr.reshape(-1).view(np.uint8))
+    return h.hexdigest()
+
+
+def _evict():
+    # drop unused files, least recently used first, until the rest fit in the budget
+    total = sum(nbytes for _, nbytes, _ in _published.values())
+    for key in list(_published.keys()):
+        if total <= _budget():
+            break
+        path, nbytes, users = _published[key]
+        if users:
+            continue
+        os.unlink(path)
+        del _published[key]
+        total -= nbytes
+
+
+def _publish(arr):
+    key = fingerprint(arr)
+    with _publock:
+        if key in _published:
+            # the same data was published before, so workers may well have it mapped already
+            entry = _published.pop(key)
+        else:
+            fd, path = mkstemp(suffix='.npy', prefix='pyxval-', dir=_sharedir())
+            with os.fdopen(fd, 'wb') as fh:
+                np.save(fh, arr)
+            entry = [path, arr.nbytes, 0]
+        entry[2] += 1
+        _published[key] = entry
+        _evict()
+    return key, entry[0]
+
+
+def _unpublish(key):
+    with _publock:
+        if key in _published:
+            _published[key][2] -= 1
+        _evict()
+
+
+@atexit_register
+def _cleanup():
+    with _publock:
+        for path, _, _ in _published.values():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        _published.clear()
+
+
+def _attach(key, path):
+    if key in _attached:
+        _attached[key] = _attached.pop(key)
+    else:
+        _attached[key] = np.asarray(np.load(path, mmap_mode='r'))
+        total = sum(a.nbytes for a in _attached.values())
+        while total > _budget() and len(_attached) > 1:
+            # the mapping goes away once the last view into it does
+            _, a = _attached.popitem(last=False)
+            total -= a.nbytes
+    return _attached[key]
+
+
+def _shared_array(key, path):
+    return SharedArray(None, path, key)
+
+
+class SharedArray(object):
+    '''
+    A handle to an ndarray that is written to a memory-mapped file the first time it is
+    pickled, so that every task sent to a worker process carries only the file's path
+    instead of the data itself.  Workers map zero-copy, read-only views using
+    :py:meth:`view`.  The creating process must call :py:meth:`release` once all tasks
+    are finished.
+    Files are keyed by the :py:func:`fingerprint` of their data and kept around after
+    being released, up to PYXVAL_CACHE_BYTES (1GiB by default), so that validating the
+    same data again neither rewrites the file nor makes the workers map it anew.
+    '''
+
+    def __init__(self, arr, path=None, key=None):
+        self.__arr = arr
+        self.__path = path
+        self.__key = key
+        self.__owner = False
+        self.__lock = Lock()
+
+    def __publish(self):
+        with self.__lock:
+            if self.__path is None:
+                self.__key, self.__path = _publish(self.__arr)
+                self.__owner = True
+        return self.__key, self.__path
+
+    def view(self):
+        if self.__arr is not None:
+            return self.__arr
+        return _attach(self.__key, self.__path)
+
+    def release(self):
+        with self.__lock:
+            if self.__owner:
+                _unpublish(self.__key)
+                self.__path = None
+                self.__owner = False
+
+    def __reduce__(self):
+        return _shared_array, self.__publish()
+
+
+class SharedSparse(object):
+    '''
+    A handle to a scipy.sparse CSR matrix whose data, indices and indptr are each a
+    :py:class:`SharedArray`, so that the matrix reaches workers in its compact form
+    and is rebuilt there around zero-copy views, just like :py:class:`SharedArray`.
+    '''
+
+    def __init__(self, a):
+        self.cls = type(a)
+        self.shape = a.shape
+        self.arrays = tuple(SharedArray(v) for v in (a.data, a.indices, a.indptr))
+
+    def view(self):
+        return self.cls(tuple(a.view() for a in self.arrays), shape=self.shape, copy=False)
+
+    def release(self):
+        for a in self.arrays:
+            a.release()
+
+
+class MappedArray(object):
+    '''
+    A handle to an array kept in a file, such as an np.memmap or an .npy file, which is
+    memory-mapped read-only wherever it's used.  Only its location is ever pickled, so a
+    dataset far larger than memory can be handed to every worker, each of which reads
+    just the rows it needs (see :py:func:`gather`).  Remote workers must see the file
+    under the same path.
+    '''
+
+    def __init__(self, filename, dtype, shape, offset=0, order='C'):
+        self.filename = filename
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+        self.offset = offset
+        self.order = order
+
+    def __len__(self):
+        return self.shape[0]
+
+    def view(self):
+        # a file rewritten in place mustn't be read through the stale mapping
+        key = (self.filename, os.stat(self.filename).st_mtime_ns, self.dtype.str, self.shape, self.offset, self.order)
+        if key not in _mapped:
+            _mapped[key] = np.memmap(self.filename, self.dtype, 'r', self.offset, self.shape, self.order)
+        return _mapped[key]
+
+    def release(self):
+        pass
+
+
+def mapped(a):
+    '''
+    Returns a :py:class:`MappedArray` for `a' if it's the path of an .npy file or an np.memmap
+    of a whole file region (rather than a view into one), otherwise returns `a' unchanged.
+    '''
+    if isinstance(a, str) and a.endswith('.npy'):
+        a = np.load(a, mmap_mode='r')
+    if isinstance(a, np.memmap) and isinstance(a.base, mmap.mmap) and a.filename is not None:
+        return MappedArray(a.filename, a.dtype, a.shape, a.offset, 'F' if np.isfortran(a) else 'C')
+    return a
+
+
+# the fewest pages a run of rows must span on average to be worth advising the kernel of
+_MINRUN = 4
+
+
+def _advice(rows, start, rowbytes, pagesize=mmap.PAGESIZE):
+    '''
+    Returns the (offset, length) byte ranges, relative to a mapping whose first row is
+    `start' bytes in, of the pages holding the given rows, one range per run of them
+    on contiguous pages.  Returns none if the rows are so sparse that each run spans
+    fewer than _MINRUN pages on average, as the advice would then cost about as many
+    system calls as the page faults it saves.
+    '''
+    rows = np.unique(np.asarray(rows, dtype=np.int64))
+    if not len(rows):
+        return []
+    first = (start + rows * rowbytes) // pagesize
+    last = (start + (rows + 1) * rowbytes - 1) // pagesize
+    # a run ends wherever the next row starts beyond the page after the last one
+    breaks = np.flatnonzero(first[1:] > last[:-1] + 1) + 1
+    lo = first[np.concatenate(([0], breaks))]
+    hi = last[np.concatenate((breaks - 1, [len(rows) - 1]))] + 1
+    if (hi - lo).sum() < _MINRUN * len(lo):
+        return []
+    return [(int(l) * pagesize, int(h - l) * pagesize) for l, h in zip(lo, hi)]
+
+
+def _willneed(a, rows):
+    # ask the kernel to start reading the pages holding the given rows of the memmap `a'
+    mm = a._mmap
+    if mm is None or not hasattr(mm, 'madvise') or not a.flags.c_contiguous or not len(rows):
+        return
+    for offset, length in _advice(rows, a.offset % mmap.ALLOCATIONGRANULARITY, a.strides[0]):
+        try:
+            mm.madvise(mmap.MADV_WILLNEED, offset, min(length, len(mm) - offset))
+        except (OSError, ValueError):
+            return
+
+
+def gather(a, index, out=None, block=1 << 24):
+    '''
+    Returns the rows `index' of `a', like a[index].  The rows of an np.memmap are read
+    a block of about `block' bytes at a time, the kernel being asked to fetch the pages
+    holding the next block's rows while the current one is copied, so only those pages
+    are ever read.
+    :param out: an array of len(index) rows to gather into
+    '''
+    if out is None:
+        out = np.empty((len(index),) + a.shape[1:], dtype=a.dtype)
+    if not isinstance(a, np.memmap) or a.ndim == 0 or not len(index):
+        return np.take(a, index, axis=0, out=out)
+    step = max(1, block // max(1, a.strides[0]))
+    _willneed(a, index[:step])
+    for i in range(0, len(index), step):
+        _willneed(a, index[i + step:i + 2 * step])
+        np.take(a, index[i:i + step], axis=0, out=out[i:i + step])
+    return out
+
+
+def share(a, pool=None):
+    '''
+    Wrap `a' in a :py:class:`SharedArray` if it's an ndarray that can be memory-mapped, or
+    in a :py:class:`SharedSparse` if it's a CSR matrix, otherwise return it unchanged.
+    Arrays bound for a pool whose workers can't see our files (one whose `local'
+    attribute is False) are left unchanged too.
+    '''
+    if not getattr(pool, 'local', True):
+        return a
+    if issparse is not None and issparse(a) and a.format == 'csr':
+        return SharedSparse(a)
+    if type(a) is not np.ndarray or a.dtype.hasobject:
+        return a
+    return SharedArray(a)
+
+
+def attach(a):
+    return a.view() if isinstance(a, (MappedArray, SharedArray, SharedSparse)) else a
+
+
+def release(*arrays):
+    for a in arrays:
+        if isinstance(a, (SharedArray, SharedSparse)):
+            a.release()
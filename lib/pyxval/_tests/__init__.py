@@ -32,11 +32,13 @@ __author__ = 'Brent Payne'
 
 
 from ._testcrossvalidator import TestCrossValidator
+from ._testfakemp import TestFakeMP
 from ._testgridsearcher import TestGridSearcher
 from ._testnestedcrossvalidator import TestNestedCrossValidator
 from ._testpickling import TestPickling
 
 __all__ = []
 __all__ += _testcrossvalidator.__all__
+__all__ += _testfakemp.__all__
 __all__ += _testgridsearcher.__all__
 __all__ += _testpickling.__all__
@@ -22,6 +22,8 @@
 
 from __future__ import division, print_function
 
+import numpy as np
+
 
 class Optimist(object):
     def __init__(self, c=0):
@@ -36,3 +38,198 @@ class Optimist(object):
     @staticmethod
     def train(x, y):
         pass
+
+
+class Fragile(Optimist):
+    def predict(self, x):
+        if self.c == 2:
+            raise ValueError('c = 2 is unsupported')
+        return super(Fragile, self).predict(x)
+
+
+class Warm(Optimist):
+    # records the c it was warm-started from, and how many were made
+    warmed = []
+    made = 0
+
+    def __init__(self, c=0, d=0):
+        super(Warm, self).__init__(c)
+        self.d = d
+        Warm.made += 1
+
+    def warm(self, previous):
+        Warm.warmed.append((previous.c, previous.d, self.c, self.d))
+
+
+class Budgeted(Optimist):
+    # records the budgets it was given
+    budgets = []
+
+    def __init__(self, c=0, iters=0):
+        super(Budgeted, self).__init__(c)
+        self.iters = iters
+        Budgeted.budgets.append(iters)
+
+
+class Fused(Optimist):
+    # fails every prediction once `fuse' of them have been made, as if the run had died
+    fuse = None
+    predictions = 0
+
+    def predict(self, x):
+        Fused.predictions += 1
+        if Fused.fuse is not None and Fused.predictions > Fused.fuse:
+            raise RuntimeError('the fuse has blown')
+        return super(Fused, self).predict(x)
+
+
+class Threshold(Optimist):
+    # optimistic only for c = 1 past a threshold
+    def __init__(self, c=0, t=0.):
+        super(Threshold, self).__init__(c)
+        self.t = t
+
+    def predict(self, x):
+        return [1 if self.c == 1 and self.t > 0.5 else 0]*len(x)
+
+
+class Line(object):
+    # predicts a * x[:, 0] + b, learning nothing
+    def __init__(self, a=0., b=0.):
+        self.a, self.b = a, b
+
+    def learn(self, x, y):
+        pass
+
+    def predict(self, x):
+        return self.a * np.asarray(x)[:, 0] + self.b
+
+    def weights(self):
+        return [1.0]
+
+
+class Sparse(Optimist):
+    # only takes scipy.sparse matrices, refusing anything that has been densified
+    def predict(self, x):
+        assert(hasattr(x, 'nnz'))
+        return [1 if self.c == 1 else 0]*x.shape[0]
+
+    @staticmethod
+    def train(x, y):
+        assert(hasattr(x, 'nnz'))
+
+
+class Mean(object):
+    # predicts the mean of its training outputs, which has a closed-form leave-one-out
+    fits = 0
+
+    def __init__(self):
+        self.mu = None
+
+    def learn(self, x, y):
+        Mean.fits += 1
+        self.mu = float(np.mean(y))
+
+    def predict(self, x):
+        return np.array([self.mu] * len(x))
+
+    def weights(self):
+        return [1.0]
+
+    def loo(self, x, y):
+        Mean.learn(self, x, y)
+        y = np.asarray(y, dtype=float)
+        return (y.sum() - y) / (len(y) - 1)
+
+
+class RunningMean(Mean):
+    # the same, learnt incrementally
+    updates = 0
+    loo = None
+
+    def __init__(self):
+        super(RunningMean, self).__init__()
+        self.n, self.total = 0, 0.
+
+    def update(self, x, y):
+        RunningMean.updates += 1
+        self.n += len(y)
+        self.total += float(np.sum(y))
+        self.mu = self.total / self.n
+        return self.n
+
+
+class Incremental(RunningMean):
+    # can only learn incrementally
+    def learn(self, x, y):
+        raise RuntimeError('learn() was called')
+
+
+class Arrayed(Optimist):
+    # takes an array kwarg, of which it tells the last element
+    made = 0
+
+    def __init__(self, c=0, w=None):
+        super(Arrayed, self).__init__(c)
+        self.w = w
+        Arrayed.made += 1
+
+    def last(self):
+        return float(self.w[-1])
+
+
+class Tunable(Optimist):
+    # has an update method that has nothing to do with learning incrementally
+    def update(self, **params):
+        self.__dict__.update(params)
+
+
+class Partial(Mean):
+    # learns incrementally under another name, its own update() being what learn() is made of
+    loo = None
+
+    def __init__(self):
+        super(Partial, self).__init__()
+        self.n, self.total = 0, 0.
+
+    def learn(self, x, y):
+        Mean.fits += 1
+        self.n, self.total = 0, 0.
+        self.update(x, y)
+
+    def update(self, x, y):
+        self.n += len(y)
+        self.total += float(np.sum(y))
+        self.mu = self.total / self.n
+
+    def partial_fit(self, x, y):
+        self.update(x, y)
+        return self.n
+
+
+class Shortcut(Mean):
+    # has its leave-one-out shortcut under another name
+    loo = None
+
+    def fast_loo(self, x, y):
+        return Mean.loo(self, x, y)
+
+
+class Columns(object):
+    # selects the first `n' columns
+    def __init__(self, n=1):
+        self.n = n
+
+    def select(self, x, y):
+        pass
+
+    def subset(self, x):
+        return np.asarray(x)[:, :self.n]
+
+    def features(self):
+        return list(range(self.n))
+
+
+class Meaner(Mean):
+    # the same, without the leave-one-out shortcut
+    loo = None
@@ -32,15 +32,26 @@ Created on 10/1/11
 
 __author__ = 'Brent Payne'
 
-import random
+import asyncio, os, random, shutil, tempfile
 import unittest
 
 import numpy as np
 
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+from pyxval import ContinuousPerfStats
 from pyxval import CrossValidator
 from pyxval import DiscretePerfStats
+from pyxval import WorkerPool
+from pyxval import _crossvalidator
+from pyxval._crossvalidator import _arrange, _buffers, _folder, _split
+from pyxval._partition import partition
+from pyxval._proxyclassifierfactory import ProxyClassifierFactory
 
-from ._optimist import Optimist
+from ._optimist import Arrayed, Mean, Meaner, Optimist, Partial, RunningMean, Shortcut, Sparse, Tunable
 
 
 __all__ = ['TestCrossValidator']
@@ -74,6 +85,186 @@ class TestCrossValidator(unittest.TestCase):
         rv = xvalor.validate(self.x, self.y)
         self.assertEquals(rv.stats.get(DiscretePerfStats.ACCURACY).mu, self.accuracy)
 
+    def test_partition(self):
+        p = partition(103, self.folds, seed=42)
+        outparts = [p.outpart(f) for f in range(self.folds)]
+        self.assertEqual(sorted(np.concatenate(outparts).tolist()), list(range(103)))
+        self.assertEqual(sorted(len(o) for o in outparts), [10] * 7 + [11] * 3)
+        self.assertEqual(sorted(np.concatenate((p.inpart(0), outparts[0])).tolist()), list(range(103)))
+        q = partition(103, self.folds, seed=42)
+        self.assertTrue(all(np.array_equal(o, q.outpart(f)) for f, o in enumerate(outparts)))
+
+        sub = p.subpartition(0, 3, seed=7)
+        self.assertEqual(len(sub), 103)
+        self.assertEqual(sorted(np.concatenate([sub.outpart(f) for f in range(3)]).tolist()), sorted(p.inpart(0).tolist()))
+
+    def test_contiguous_split(self):
+        p = partition(len(self.x), 3, seed=1)
+        ap, ax, ay = _arrange(p, self.x, self.y)
+        for f in range(3):
+            xin, yin, xout, yout = _split(f, p, self.x, self.y)
+            axin, ayin, axout, ayout = _split(f, ap, ax, ay)
+            self.assertTrue(np.array_equal(xin, axin) and np.array_equal(xout, axout))
+            self.assertEqual((yin, yout), (list(ayin), list(ayout)))
+            self.assertTrue(np.shares_memory(axout, ax))
+
+    def test_contiguous_fold(self):
+        p = partition(len(self.x), 3, seed=1)
+        ap, ax, ay = _arrange(p, self.x, self.y)
+        classifier = ProxyClassifierFactory(Optimist, learn_func=Optimist.train).generate()()
+        # the largest training set first
+        f, g, h = sorted(range(3), key=lambda f: len(p.outpart(f)))
+        _, _, yout, preds, _ = _folder(f, ap, ax, ay, classifier, None)
+        # the held-out rows come back as rows of their own
+        self.assertEqual(yout, [self.y[i] for i in p.outpart(f)])
+        # and the next fold reuses the training set buffer, unless it's too big to keep
+        buf = _buffers.x
+        _folder(g, ap, ax, ay, classifier, None)
+        self.assertIs(_buffers.x, buf)
+        saved, _crossvalidator._MAXBUFFER = _crossvalidator._MAXBUFFER, buf.nbytes - 1
+        try:
+            _folder(h, ap, ax, ay, classifier, None)
+            self.assertFalse(hasattr(_buffers, 'x'))
+        finally:
+            _crossvalidator._MAXBUFFER = saved
+
+    def test_crossvalidator_contiguous(self):
+        xvalor = CrossValidator(Optimist, self.folds, learn_func=Optimist.train, seed=0, contiguous=True)
+        for x, y in ((self.x, np.array(self.y)), (self.x.tolist(), self.y)):
+            rv = xvalor.validate(x, y)
+            self.assertEqual(rv.stats.get(DiscretePerfStats.ACCURACY).mu, self.accuracy)
+
+    @unittest.skipIf(sparse is None, 'scipy is not installed')
+    def test_crossvalidator_sparse(self):
+        x = sparse.random(len(self.y), 1000, density=0.01, format='coo')
+        for contiguous in (False, True):
+            xvalor = CrossValidator(Sparse, self.folds, learn_func=Sparse.train, contiguous=contiguous)
+            rv = xvalor.validate(x, self.y)
+            self.assertEqual(rv.stats.get(DiscretePerfStats.ACCURACY).mu, self.accuracy)
+
+    def test_crossvalidator_mapped(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'x.npy')
+            np.save(path, self.x)
+            for x in (path, np.load(path, mmap_mode='r')):
+                for contiguous in (False, True):
+                    xvalor = CrossValidator(Optimist, self.folds, learn_func=Optimist.train, contiguous=contiguous)
+                    rv = xvalor.validate(x, self.y)
+                    self.assertEqual(rv.stats.get(DiscretePerfStats.ACCURACY).mu, self.accuracy)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_crossvalidator_fastloo(self):
+        x, y = np.random.rand(20, 2), np.random.rand(20)
+        Mean.fits = 0
+        xvalor = CrossValidator(Mean, len(y), scorer_cls=ContinuousPerfStats, weights_func='weights')
+        rv = xvalor.validate(x, y, parallel=False)
+        self.assertEqual(Mean.fits, 1)
+        loo = np.array([(y.sum() - v) / (len(y) - 1) for v in y])
+        rmse = ContinuousPerfStats.calcstat_continuous(y, loo, [1.0])[2]
+        self.assertAlmostEqual(rv.stats.get(ContinuousPerfStats.RMSE).mu, rmse)
+
+        Mean.fits = 0
+        xvalor = CrossValidator(Meaner, len(y), scorer_cls=ContinuousPerfStats, weights_func='weights')
+        xvalor.validate(x, y, parallel=False)
+        self.assertEqual(Mean.fits, len(y))
+
+    def test_crossvalidator_incremental(self):
+        x, y = np.random.rand(50, 2), np.random.rand(50)
+        folds = 16
+        standard = CrossValidator(Meaner, folds, scorer_cls=ContinuousPerfStats, weights_func='weights', seed=3)
+        rv = standard.validate(x, y, parallel=False)
+        for parallel in (False, True):
+            RunningMean.updates = 0
+            tree = CrossValidator(RunningMean, folds, scorer_cls=ContinuousPerfStats, weights_func='weights', seed=3, update_func='update')
+            rt = tree.validate(x, y, parallel=parallel)
+            for stat in (ContinuousPerfStats.RSQUARED, ContinuousPerfStats.RMSE):
+                self.assertTrue(np.allclose(sorted(rt.stats.get(stat)), sorted(rv.stats.get(stat))))
+            # the last update of every fold's model learnt all of the rows outside of it
+            self.assertEqual(sum(rt.learn), (folds - 1) * len(y))
+        # every one of the log2(16) levels of the tree learns each fold once, rather than 15 times in all
+        RunningMean.updates = 0
+        tree.validate(x, y, parallel=False)
+        self.assertEqual(RunningMean.updates, folds * 4)
+        # but only when asked to
+        RunningMean.updates = 0
+        CrossValidator(RunningMean, folds, scorer_cls=ContinuousPerfStats, weights_func='weights', seed=3).validate(x, y, parallel=False)
+        self.assertEqual(RunningMean.updates, 0)
+        rv = CrossValidator(Tunable, self.folds, learn_func=Tunable.train).validate(self.x, self.y, parallel=False)
+        self.assertEqual(rv.stats.get(DiscretePerfStats.ACCURACY).mu, self.accuracy)
+        self.assertRaises(ValueError, CrossValidator, Meaner, folds, update_func='update')
+
+    def test_crossvalidator_renamed(self):
+        x, y = np.random.rand(50, 2), np.random.rand(50)
+        folds = 16
+        rv = CrossValidator(Meaner, folds, scorer_cls=ContinuousPerfStats, weights_func='weights', seed=3).validate(x, y, parallel=False)
+        # an incremental update and a leave-one-out shortcut found under the names they were asked for
+        for xvalor, fits in (
+                (CrossValidator(Partial, folds, scorer_cls=ContinuousPerfStats, weights_func='weights', seed=3, update_func='partial_fit'), 0),
+                # while a classifier's own update() is left be when it isn't asked for
+                (CrossValidator(Partial, folds, scorer_cls=ContinuousPerfStats, weights_func='weights', seed=3), folds)):
+            Mean.fits = 0
+            rt = xvalor.validate(x, y, parallel=False)
+            self.assertEqual(Mean.fits, fits)
+            self.assertTrue(np.allclose(sorted(rt.stats.get(ContinuousPerfStats.RMSE)), sorted(rv.stats.get(ContinuousPerfStats.RMSE))))
+        Mean.fits = 0
+        CrossValidator(Shortcut, len(y), scorer_cls=ContinuousPerfStats, weights_func='weights', loo_func='fast_loo').validate(x, y, parallel=False)
+        self.assertEqual(Mean.fits, 1)
+
+    def test_crossvalidator_cache_keys(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            xvalor = CrossValidator(Arrayed, self.folds, learn_func=Arrayed.train, seed=1, cache=os.path.join(tmpdir, 'results.db'))
+            # lambdas all share a name, and the repr of a large array elides all but a few elements
+            w = np.zeros(2000)
+            rv = xvalor.validate(self.x, self.y, classifier_kwargs={ 'w': w }, extra=lambda c: c.last(), parallel=False)
+            self.assertEqual(rv.extra, [0.] * self.folds)
+            rv = xvalor.validate(self.x, self.y, classifier_kwargs={ 'w': w }, extra=lambda c: c.last() + 1, parallel=False)
+            self.assertEqual(rv.extra, [1.] * self.folds)
+            w = w.copy()
+            w[-1] = 2.
+            rv = xvalor.validate(self.x, self.y, classifier_kwargs={ 'w': w }, extra='last', parallel=False)
+            self.assertEqual(rv.extra, [2.] * self.folds)
+            # while the same validation is still found
+            Arrayed.made = 0
+            rv = xvalor.validate(self.x, self.y, classifier_kwargs={ 'w': w }, extra='last', parallel=False)
+            self.assertEqual(Arrayed.made, 0)
+            self.assertEqual(rv.extra, [2.] * self.folds)
+
+    def test_crossvalidator_pool(self):
+        with WorkerPool(processes=2) as pool:
+            xvalor = CrossValidator(Optimist, self.folds, learn_func=Optimist.train, pool=pool)
+            for _ in range(3):
+                rv = xvalor.validate(self.x, self.y)
+                self.assertEqual(rv.stats.get(DiscretePerfStats.ACCURACY).mu, self.accuracy)
+
+    def test_crossvalidator_backends(self):
+        xvalor = CrossValidator(Optimist, self.folds, learn_func=Optimist.train)
+        for backend in ('process', 'thread', 'serial'):
+            rv = xvalor.validate(self.x, self.y, parallel=backend)
+            self.assertEqual(rv.stats.get(DiscretePerfStats.ACCURACY).mu, self.accuracy)
+
+    def test_crossvalidator_ivalidate(self):
+        xvalor = CrossValidator(Optimist, self.folds, learn_func=Optimist.train)
+        folds = list(xvalor.ivalidate(self.x, self.y))
+        self.assertEqual(len(folds), self.folds)
+        accuracy = np.mean([rv.stats.get(DiscretePerfStats.ACCURACY).mu for rv in folds])
+        self.assertAlmostEqual(accuracy, self.accuracy)
+
+    def test_crossvalidator_avalidate(self):
+        xvalor = CrossValidator(Optimist, self.folds, learn_func=Optimist.train)
+
+        async def validations(pool):
+            xvalor.pool = pool
+            return await asyncio.gather(xvalor.avalidate(self.x, self.y), xvalor.avalidate(self.x, self.y))
+
+        with WorkerPool() as pool:
+            results = asyncio.run(validations(pool))
+
+        for rv in results:
+            accuracy = rv.stats.get(DiscretePerfStats.ACCURACY).mu
+            self.assertAlmostEqual(accuracy, self.accuracy)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,383 @@
+# pyxval :: (Python CROSS-VALidation) A Python library containing some useful
+# machine learning interfaces and utilities for supervised learning and 
+# prediction (including cross-validation, grid-search, and performance
+# statistics) 
+# 
+# Copyright (C) 2011 N Lance Hepler <nlhepler@gmail.com> 
+# Copyright (C) 2011 Brent Payne <brent.payne@gmail.com> 
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+from __future__ import division, print_function
+
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+try:
+    import pickle as pickle
+except ImportError:
+    import pickle
+
+try:
+    import threadpoolctl
+except ImportError:
+    threadpoolctl = None
+
+from pyxval import WorkerPool
+from pyxval import _fakemp
+from pyxval._fakemp import BACKENDS, FAKEMP_LOGGER, ManagerPool, afarmout, farmout, farmworker, ifarmout, serve
+
+
+__all__ = ['TestFakeMP']
+
+
+def _pid(i):
+    return i, os.getpid()
+
+
+def _stall_once(i, flagdir):
+    flag = os.path.join(flagdir, str(i))
+    if i == 0 and not os.path.exists(flag):
+        open(flag, 'w').close()
+        time.sleep(30)
+    return i, os.getpid()
+
+
+def _sleep(i, seconds):
+    time.sleep(seconds)
+    return i, os.getpid()
+
+
+def _exit_once(i, flagdir):
+    flag = os.path.join(flagdir, str(i))
+    if i == 0 and not os.path.exists(flag):
+        open(flag, 'w').close()
+        os._exit(1)
+    return i, os.getpid()
+
+
+def _within(seconds, f, *args):
+    # f(*args), or None if it's still going after `seconds'
+    results = []
+    t = threading.Thread(target=lambda: results.append(f(*args)))
+    t.daemon = True
+    t.start()
+    t.join(seconds)
+    return results[0] if len(results) else None
+
+
+def _thread(i):
+    return i, threading.current_thread().ident
+
+
+def _limits(i):
+    affinity = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else None
+    return i, os.environ.get('OMP_NUM_THREADS'), affinity
+
+
+def _blas(i):
+    from threadpoolctl import threadpool_info
+    return i, max([info['num_threads'] for info in threadpool_info()] or [1])
+
+
+def _interrupt(i):
+    if i == 0:
+        raise KeyboardInterrupt
+    return i, os.getpid()
+
+
+def _fail_odd(i):
+    if i % 2:
+        raise ValueError('odd task %d' % i)
+    return i, os.getpid()
+
+
+class TestFakeMP(unittest.TestCase):
+
+    def test_farmout(self):
+        results = farmout(
+            num=8,
+            setup=lambda i: (_pid, i),
+            worker=farmworker,
+            isresult=lambda r: isinstance(r, tuple)
+        )
+        self.assertEqual([i for i, _ in results], list(range(8)))
+
+    def test_farmout_backends(self):
+        for backend in BACKENDS:
+            results = farmout(
+                num=8,
+                setup=lambda i: (_pid, i),
+                worker=farmworker,
+                isresult=lambda r: isinstance(r, tuple),
+                backend=backend
+            )
+            self.assertEqual([i for i, _ in results], list(range(8)))
+
+    def test_farmout_thread_backend_skips_pickling(self):
+        unpicklable = lambda: None
+        results = farmout(
+            num=4,
+            setup=lambda i: (_thread, i),
+            worker=farmworker,
+            isresult=lambda r: isinstance(r, tuple),
+            pickletest=unpicklable,
+            backend='thread'
+        )
+        self.assertEqual([i for i, _ in results], list(range(4)))
+        self.assertTrue(all(t != threading.current_thread().ident for _, t in results))
+
+    def test_workerpool_reuse(self):
+        with WorkerPool(processes=2, preload=('numpy',)) as pool:
+            pids = set()
+            for _ in range(3):
+                results = farmout(
+                    num=4,
+                    setup=lambda i: (_pid, i),
+                    worker=farmworker,
+                    isresult=lambda r: isinstance(r, tuple),
+                    pool=pool
+                )
+                self.assertEqual([i for i, _ in results], list(range(4)))
+                pids.update(p for _, p in results)
+            if pool.parallel:
+                self.assertTrue(len(pids) <= 2)
+        self.assertRaises(ValueError, pool.apply_async, _pid, (0,))
+
+    def test_workerpool_pickles_detached(self):
+        with WorkerPool(processes=1) as pool:
+            self.assertEqual(pickle.loads(pickle.dumps(pool)), None)
+
+    def test_farmout_timeout_retries_on_same_pool(self):
+        pool = WorkerPool(processes=2)
+        flagdir = tempfile.mkdtemp()
+        try:
+            # stuck threads can't be terminated, only stuck processes can
+            if pool.backend != 'process':
+                self.skipTest('multiprocessing disabled')
+            begin = time.time()
+            results = farmout(
+                num=4,
+                setup=lambda i: (_stall_once, i, flagdir),
+                worker=farmworker,
+                isresult=lambda r: isinstance(r, tuple),
+                pool=pool,
+                timeout=1
+            )
+            self.assertEqual([i for i, _ in results], list(range(4)))
+            # nor does the stalled task keep the pool from shutting down
+            self.assertTrue(_within(10, lambda: pool.shutdown() or True))
+            self.assertTrue(time.time() - begin < 15)
+        finally:
+            pool.shutdown(wait=False)
+            shutil.rmtree(flagdir)
+
+    def test_farmout_survives_dead_worker(self):
+        pool = WorkerPool(processes=2)
+        flagdir = tempfile.mkdtemp()
+        try:
+            if pool.backend != 'process':
+                self.skipTest('multiprocessing disabled')
+            farm = lambda: farmout(
+                num=4,
+                setup=lambda i: (_exit_once, i, flagdir),
+                worker=farmworker,
+                isresult=lambda r: isinstance(r, tuple),
+                pool=pool
+            )
+            # the task whose worker died is retried without any timeout
+            results = _within(30, farm)
+            self.assertEqual([i for i, _ in results], list(range(4)))
+            self.assertTrue(_within(10, lambda: pool.shutdown() or True))
+        finally:
+            pool.shutdown(wait=False)
+            shutil.rmtree(flagdir)
+
+    def test_farmout_timeout_counts_from_start(self):
+        # more tasks than workers, each well within the timeout but not once queued behind the others
+        for pooled, chunksize in ((True, None), (True, 1), (False, None)):
+            pool = WorkerPool(processes=2) if pooled else None
+            try:
+                if pooled and pool.backend != 'process':
+                    self.skipTest('multiprocessing disabled')
+                results = farmout(
+                    num=6,
+                    setup=lambda i: (_sleep, i, 0.5),
+                    worker=farmworker,
+                    isresult=lambda r: isinstance(r, tuple),
+                    attempts=1,
+                    pool=pool,
+                    timeout=0.9,
+                    failfast=False,
+                    chunksize=chunksize
+                )
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+            self.assertEqual([r[0] if isinstance(r, tuple) else r for r in results], list(range(6)))
+
+    def test_afarmout_timeout_counts_from_start(self):
+        for pooled in (True, False):
+            pool = WorkerPool(processes=2) if pooled else None
+            try:
+                if pooled and pool.backend != 'process':
+                    self.skipTest('multiprocessing disabled')
+                results = asyncio.run(afarmout(
+                    num=6,
+                    setup=lambda i: (_sleep, i, 0.5),
+                    worker=farmworker,
+                    isresult=lambda r: isinstance(r, tuple),
+                    attempts=1,
+                    pool=pool,
+                    timeout=0.9,
+                    failfast=False
+                ))
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+            self.assertEqual([r[0] if isinstance(r, tuple) else r for r in results], list(range(6)))
+
+    def test_workerpool_threads_and_affinity(self):
+        omp = os.environ.get('OMP_NUM_THREADS')
+        with WorkerPool(processes=2, threads=1, affinity=True) as pool:
+            if pool.backend != 'process':
+                self.skipTest('multiprocessing disabled')
+            results = farmout(
+                num=4,
+                setup=lambda i: (_limits, i),
+                worker=farmworker,
+                isresult=lambda r: isinstance(r, tuple),
+                pool=pool
+            )
+        self.assertTrue(all(threads == '1' for _, threads, _ in results))
+        if hasattr(os, 'sched_getaffinity'):
+            self.assertTrue(all(len(cpus) == 1 for _, _, cpus in results))
+        # while the parent's own runtimes are left be
+        self.assertEqual(os.environ.get('OMP_NUM_THREADS'), omp)
+
+    def test_interrupt_spares_shared_pool(self):
+        with WorkerPool(processes=2) as pool:
+            tasks = dict(num=4, setup=lambda i: (_interrupt, i), worker=farmworker, isresult=lambda r: isinstance(r, tuple), pool=pool)
+            self.assertRaises(KeyboardInterrupt, list, ifarmout(**tasks))
+            # the caller's pool is still there to use
+            results = farmout(**dict(tasks, setup=lambda i: (_interrupt, i + 1)))
+            self.assertEqual([r[0] for r in results], [1, 2, 3, 4])
+
+    def test_checkthreads_warns_once(self):
+        saved = _fakemp.threadpool_limits, _fakemp._cpus, _fakemp._warnedthreads
+        _fakemp.threadpool_limits, _fakemp._cpus, _fakemp._warnedthreads = None, lambda: list(range(8)), False
+        try:
+            with self.assertLogs(FAKEMP_LOGGER, 'WARNING') as logs:
+                for _ in range(3):
+                    _fakemp._checkthreads(4)
+            self.assertEqual(len(logs.records), 1)
+        finally:
+            _fakemp.threadpool_limits, _fakemp._cpus, _fakemp._warnedthreads = saved
+
+    @unittest.skipIf(threadpoolctl is None, 'threadpoolctl is not installed')
+    def test_workerpool_blas_threads(self):
+        for start_method in ('fork', 'spawn'):
+            with WorkerPool(processes=2, threads=1, start_method=start_method) as pool:
+                if pool.backend != 'process':
+                    self.skipTest('multiprocessing disabled')
+                results = farmout(
+                    num=4,
+                    setup=lambda i: (_blas, i),
+                    worker=farmworker,
+                    isresult=lambda r: isinstance(r, tuple),
+                    pool=pool
+                )
+            self.assertTrue(all(threads == 1 for _, threads in results))
+
+    def test_farmout_records_failures(self):
+        with WorkerPool(processes=2) as pool:
+            results = farmout(
+                num=4,
+                setup=lambda i: (_fail_odd, i),
+                worker=farmworker,
+                isresult=lambda r: isinstance(r, tuple),
+                pool=pool,
+                failfast=False
+            )
+        self.assertEqual([r[0] for r in results[::2]], [0, 2])
+        self.assertTrue(all(isinstance(r, ValueError) for r in results[1::2]))
+
+    def test_farmout_chunks(self):
+        for chunksize in (None, 1, 3, 100):
+            with WorkerPool(processes=2) as pool:
+                results = farmout(
+                    num=50,
+                    setup=lambda i: (_fail_odd, i),
+                    worker=farmworker,
+                    isresult=lambda r: isinstance(r, tuple),
+                    pool=pool,
+                    failfast=False,
+                    chunksize=chunksize
+                )
+            self.assertEqual([r[0] for r in results[::2]], list(range(0, 50, 2)))
+            self.assertTrue(all(isinstance(r, ValueError) for r in results[1::2]))
+
+    def test_managerpool_localhost(self):
+        with ManagerPool(('127.0.0.1', 0), processes=2) as pool:
+            # spawn, so the workers don't inherit the pool's listening socket
+            ctx = multiprocessing.get_context('spawn')
+            server = ctx.Process(target=serve, args=(pool.address, pool.authkey, 2, 1, 30))
+            server.start()
+            results = farmout(
+                num=8,
+                setup=lambda i: (_fail_odd, i),
+                worker=farmworker,
+                isresult=lambda r: isinstance(r, tuple),
+                pool=pool,
+                failfast=False
+            )
+        server.join(30)
+        self.assertEqual(server.exitcode, 0)
+        self.assertEqual([r[0] for r in results[::2]], [0, 2, 4, 6])
+        self.assertTrue(all(r[1] != os.getpid() for r in results[::2]))
+        self.assertTrue(all(isinstance(r, ValueError) for r in results[1::2]))
+
+    def test_managerpool_abandoned(self):
+        flagdir = tempfile.mkdtemp()
+        try:
+            pool = ManagerPool(('127.0.0.1', 0), processes=2)
+            ctx = multiprocessing.get_context('spawn')
+            server = ctx.Process(target=serve, args=(pool.address, pool.authkey, 2, 1, 30))
+            server.start()
+            # the remote worker running task 0 dies, so the task is retried on the other one
+            results = farmout(
+                num=4,
+                setup=lambda i: (_exit_once, i, flagdir),
+                worker=farmworker,
+                isresult=lambda r: isinstance(r, tuple),
+                pool=pool,
+                timeout=2
+            )
+            self.assertEqual([i for i, _ in results], list(range(4)))
+            self.assertTrue(_within(10, lambda: pool.shutdown() or True))
+            server.join(30)
+        finally:
+            pool.shutdown(wait=False)
+            shutil.rmtree(flagdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -32,16 +32,22 @@ Created on 10/1/11
 
 __author__ = 'Lance Hepler'
 
-import random
+import asyncio, multiprocessing, os, random, tempfile
 import unittest
 
 import numpy as np
 
+from pyxval import Checkpoint
 from pyxval import DiscretePerfStats
+from pyxval import ContinuousPerfStats
 from pyxval import CrossValidator
 from pyxval import GridSearcher
+from pyxval import ResultCache
+from pyxval import Uniform
+from pyxval._fakemp import ManagerPool, serve
+from pyxval._selectinggridsearcher import SelectingGridSearcher
 
-from ._optimist import Optimist
+from ._optimist import Budgeted, Columns, Fragile, Fused, Line, Optimist, Threshold, Warm
 
 
 __all__ = ['TestGridSearcher']
@@ -89,6 +95,388 @@ class TestGridSearcher(unittest.TestCase):
         yhat = xgser.predict([1])
         self.assertEquals(yhat, [1])
 
+    def test_gridsearcher_igridsearch(self):
+        xgser = GridSearcher(
+            Optimist,
+            CrossValidator,
+            gridsearch_kwargs={ 'c': range(5) },
+            validator_kwargs={
+                'folds': 10,
+                'scorer_cls': DiscretePerfStats,
+                'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+            },
+            learn_func=Optimist.train
+        )
+        results = list(xgser.igridsearch(self.x, self.y))
+        self.assertEqual(sorted(r.kwargs['c'] for r in results), list(range(5)))
+        self.assertEqual(max(results).kwargs['c'], 1)
+
+    def test_gridsearcher_agridsearch(self):
+        xgser = GridSearcher(
+            Optimist,
+            CrossValidator,
+            gridsearch_kwargs={ 'c': range(5) },
+            validator_kwargs={
+                'folds': 10,
+                'scorer_cls': DiscretePerfStats,
+                'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+            },
+            learn_func=Optimist.train
+        )
+        best = asyncio.run(xgser.agridsearch(self.x, self.y))
+        self.assertEqual(best.kwargs['c'], 1)
+
+    def test_gridsearcher_records_failures(self):
+        xgser = GridSearcher(
+            Fragile,
+            CrossValidator,
+            gridsearch_kwargs={ 'c': range(5) },
+            validator_kwargs={
+                'folds': 10,
+                'scorer_cls': DiscretePerfStats,
+                'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+            },
+            learn_func=Fragile.train,
+            failfast=False
+        )
+        best = xgser.gridsearch(self.x, self.y)
+        self.assertEqual(best.kwargs['c'], 1)
+        self.assertFalse(best.failed)
+
+    def test_gridsearcher_warm_axis(self):
+        Warm.warmed = []
+        xgser = GridSearcher(
+            Warm,
+            CrossValidator,
+            gridsearch_kwargs={ 'd': range(2), 'c': range(4) },
+            validator_kwargs={
+                'folds': 5,
+                'scorer_cls': DiscretePerfStats,
+                'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+            },
+            learn_func=Warm.train,
+            warm_axis='c'
+        )
+        results = list(xgser.igridsearch(self.x, self.y, parallel=False))
+        self.assertEqual(sorted((r.kwargs['c'], r.kwargs['d']) for r in results), [(c, d) for c in range(4) for d in range(2)])
+        # every fold walks c in order for each d
+        self.assertEqual(sorted(Warm.warmed), sorted([(c, d, c + 1, d) for c in range(3) for d in range(2)] * 5))
+        self.assertEqual(xgser.gridsearch(self.x, self.y).kwargs['c'], 1)
+
+    def test_gridsearcher_warm_cache(self):
+        validator_kwargs = {
+            'folds': 5,
+            'scorer_cls': DiscretePerfStats,
+            'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+            'seed': 3,
+        }
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ResultCache(os.path.join(tmpdir, 'results.db'))
+            xgser = GridSearcher(
+                Warm,
+                CrossValidator,
+                gridsearch_kwargs={ 'd': range(2), 'c': range(4) },
+                validator_kwargs=dict(validator_kwargs, cache=cache),
+                learn_func=Warm.train,
+                warm_axis='c'
+            )
+            list(xgser.igridsearch(self.x, self.y, parallel=False))
+            # the warm-started results are found by the same warm search
+            Warm.made = 0
+            list(xgser.igridsearch(self.x, self.y, parallel=False))
+            self.assertEqual(Warm.made, 0)
+            # but never by a validation from scratch
+            xvalor = CrossValidator(Warm, learn_func=Warm.train, cache=cache, **validator_kwargs)
+            xvalor.validate(self.x, self.y, classifier_kwargs={ 'c': 1, 'd': 0 }, parallel=False)
+            self.assertEqual(Warm.made, 5)
+
+    def test_selectinggridsearcher_resume(self):
+        xgser = SelectingGridSearcher(
+            Fused,
+            Columns,
+            CrossValidator,
+            { 'c': range(5) },
+            selector_kwargs={ 'n': 2 },
+            validator_kwargs={
+                'folds': 5,
+                'scorer_cls': DiscretePerfStats,
+                'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+                'seed': 3,
+            },
+            learn_func=Fused.train
+        )
+        Fused.fuse = None
+        expected = xgser.gridsearch(self.x, self.y, parallel=False)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'search.ckpt')
+            best = xgser.gridsearch(self.x, self.y, parallel=False, resume=path)
+            self.assertEqual(best.kwargs, expected.kwargs)
+            self.assertEqual(xgser.features(), [0, 1])
+            # the resumed search makes no predictions at all
+            Fused.predictions = 0
+            xgser.gridsearch(self.x, self.y, parallel=False, resume=path)
+            self.assertEqual(Fused.predictions, 0)
+
+    def test_gridsearcher_halving(self):
+        x = np.random.rand(90, 3)
+        y = [1]*80 + [0]*10
+        random.shuffle(y)
+        validator_kwargs = {
+            'folds': 3,
+            'scorer_cls': DiscretePerfStats,
+            'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+        }
+        for search in ('halving', 'hyperband'):
+            Budgeted.budgets = []
+            xgser = GridSearcher(
+                Budgeted,
+                CrossValidator,
+                gridsearch_kwargs={ 'c': range(27) },
+                validator_kwargs=dict(validator_kwargs),
+                learn_func=Budgeted.train,
+                search=search,
+                budget='iters',
+                min_budget=1,
+                max_budget=27,
+                seed=0
+            )
+            results = list(xgser.igridsearch(x, y, parallel=False))
+            # only the survivors reach the full budget
+            self.assertTrue(0 < len(results) < 27)
+            self.assertTrue(all(r.kwargs['iters'] == 27 for r in results))
+            self.assertEqual(sorted(set(Budgeted.budgets)), [1, 3, 9, 27])
+            self.assertEqual(xgser.gridsearch(x, y).kwargs['c'], 1)
+        xgser = GridSearcher(
+            Budgeted,
+            CrossValidator,
+            gridsearch_kwargs={ 'c': range(9) },
+            validator_kwargs=dict(validator_kwargs),
+            learn_func=Budgeted.train,
+            search='halving',
+            seed=0
+        )
+        results = list(xgser.igridsearch(x, y, parallel=False))
+        self.assertEqual([r.kwargs['c'] for r in results], [1])
+
+    def test_gridsearcher_sampler(self):
+        validator_kwargs = {
+            'folds': 5,
+            'scorer_cls': DiscretePerfStats,
+            'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+        }
+        gridsearch_kwargs = { 'c': range(3), 't': Uniform(0, 1) }
+        self.assertRaises(ValueError, GridSearcher, Threshold, CrossValidator, gridsearch_kwargs, validator_kwargs=dict(validator_kwargs))
+        for sampler in ('random', 'lhs', 'sobol'):
+            xgser = GridSearcher(
+                Threshold,
+                CrossValidator,
+                gridsearch_kwargs=gridsearch_kwargs,
+                validator_kwargs=dict(validator_kwargs),
+                learn_func=Threshold.train,
+                sampler=sampler,
+                samples=16,
+                seed=0
+            )
+            results = list(xgser.igridsearch(self.x, self.y, parallel=False))
+            self.assertEqual(len(results), 16)
+            self.assertTrue(all(r.kwargs['c'] in range(3) and 0 <= r.kwargs['t'] < 1 for r in results))
+            if sampler == 'lhs':
+                # one sample in every sixteenth of the range
+                self.assertEqual(sorted(int(r.kwargs['t'] * 16) for r in results), list(range(16)))
+            best = xgser.gridsearch(self.x, self.y)
+            self.assertEqual(best.kwargs['c'], 1)
+            self.assertTrue(best.kwargs['t'] > 0.5)
+
+    def test_gridsearcher_bayes(self):
+        x = np.random.rand(50, 2)
+        y = x[:, 0]
+        xgser = GridSearcher(
+            Line,
+            CrossValidator,
+            gridsearch_kwargs={ 'a': np.linspace(0, 2, 21), 'b': np.linspace(-1, 1, 21) },
+            validator_kwargs={
+                'folds': 5,
+                'scorer_cls': ContinuousPerfStats,
+                'scorer_kwargs': { 'optstat': ContinuousPerfStats.RSQUARED },
+            },
+            weights_func='weights',
+            search='bayes',
+            evaluations=60,
+            seed=0
+        )
+        results = list(xgser.igridsearch(x, y, parallel=False))
+        self.assertEqual(len(results), 60)
+        self.assertEqual(len(set((r.kwargs['a'], r.kwargs['b']) for r in results)), 60)
+        # the optimum of the 441 combinations is found in a seventh of the evaluations
+        best = xgser.gridsearch(x, y, parallel=False)
+        self.assertAlmostEqual(best.kwargs['a'], 1.)
+        self.assertAlmostEqual(best.kwargs['b'], 0.)
+
+    def test_gridsearcher_race(self):
+        # the pruning is statistical, so the data is fixed for the test to be deterministic
+        x = np.random.RandomState(0).rand(100, 3)
+        y = [1]*80 + [0]*20
+        random.Random(0).shuffle(y)
+        for race in ('ttest', 'frace'):
+            Budgeted.budgets = []
+            xgser = GridSearcher(
+                Budgeted,
+                CrossValidator,
+                gridsearch_kwargs={ 'c': range(20) },
+                validator_kwargs={
+                    'folds': 10,
+                    'scorer_cls': DiscretePerfStats,
+                    'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+                    'seed': 0,
+                },
+                learn_func=Budgeted.train,
+                race=race
+            )
+            results = list(xgser.igridsearch(x, y, parallel=False))
+            self.assertTrue(1 in [r.kwargs['c'] for r in results])
+            self.assertTrue(len(results) < 20)
+            # every fold fit makes a classifier, and most of them were never needed
+            self.assertTrue(len(Budgeted.budgets) < 20 * 10 / 2)
+            self.assertEqual(xgser.gridsearch(x, y, parallel=False).kwargs['c'], 1)
+
+    def test_gridsearcher_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ResultCache(os.path.join(tmpdir, 'results.db'))
+            validator_kwargs = {
+                'folds': 5,
+                'scorer_cls': DiscretePerfStats,
+                'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+                'seed': 7,
+                'cache': cache,
+            }
+            searches = []
+            for cs in (range(5), range(5), range(7)):
+                Budgeted.budgets = []
+                xgser = GridSearcher(
+                    Budgeted,
+                    CrossValidator,
+                    gridsearch_kwargs={ 'c': cs },
+                    validator_kwargs=dict(validator_kwargs),
+                    learn_func=Budgeted.train
+                )
+                best = xgser.gridsearch(self.x, self.y, parallel=False)
+                searches.append((len(Budgeted.budgets), best.kwargs['c'], best.stats.get(best.stats.optstat).mu))
+            # a repeated search computes nothing, an extended one only its new combinations
+            self.assertEqual([n for n, _, _ in searches], [5 * 5, 0, 2 * 5])
+            self.assertEqual(set((c, mu) for _, c, mu in searches), set([searches[0][1:]]))
+            Budgeted.budgets = []
+            r = xgser.validator.validate(self.x, self.y, classifier_kwargs={ 'c': 1 }, parallel=False)
+            self.assertEqual(Budgeted.budgets, [])
+            self.assertEqual(r.stats.get(r.stats.optstat).mu, searches[0][2])
+
+    def test_gridsearcher_resume(self):
+        validator_kwargs = {
+            'folds': 5,
+            'scorer_cls': DiscretePerfStats,
+            'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+            'seed': 5,
+        }
+        xgser = GridSearcher(
+            Fused,
+            CrossValidator,
+            gridsearch_kwargs={ 'c': range(5) },
+            validator_kwargs=validator_kwargs,
+            learn_func=Fused.train
+        )
+        Fused.fuse = None
+        expected = xgser.gridsearch(self.x, self.y, parallel=False)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'search.ckpt')
+            Fused.fuse, Fused.predictions = 12, 0
+            self.assertRaises(RuntimeError, xgser.gridsearch, self.x, self.y, parallel=False, resume=path)
+            # the resumed search makes only the predictions that hadn't been made
+            Fused.fuse, Fused.predictions = None, 0
+            best = xgser.gridsearch(self.x, self.y, parallel=False, resume=path)
+            self.assertEqual(Fused.predictions, 5 * 5 - 12)
+            self.assertEqual(best.kwargs, expected.kwargs)
+            self.assertEqual(list(best.stats.get(DiscretePerfStats.ACCURACY)), list(expected.stats.get(DiscretePerfStats.ACCURACY)))
+            # and a checkpoint belongs to a single search
+            xgser.gridsearch_kwargs = { 'c': range(6) }
+            self.assertRaises(ValueError, xgser.gridsearch, self.x, self.y, parallel=False, resume=path)
+
+    def test_checkpoint_appends(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'search.ckpt')
+            checkpoint = Checkpoint(path, interval=0)
+            checkpoint.check('search')
+            sizes = []
+            for t in range(3):
+                checkpoint.record('units', t, b'x' * 1000)
+                sizes.append(os.path.getsize(path + '.log'))
+            # every save appends only the result that came in since the last
+            self.assertLess(sizes[2] - sizes[1], 1500)
+            self.assertFalse(os.path.exists(path))
+            # the end of a log cut short by a crash is left out
+            with open(path + '.log', 'ab') as fh:
+                fh.write(b'\x80\x05')
+            resumed = Checkpoint(path)
+            self.assertEqual(sorted(resumed.results('units')), [0, 1, 2])
+            resumed.check('search')
+            resumed.record('units', 3, b'y')
+            resumed.save()
+            self.assertEqual(sorted(Checkpoint(path).results('units')), [0, 1, 2, 3])
+            # and the log is folded into the snapshot
+            resumed.compact()
+            self.assertFalse(os.path.exists(path + '.log'))
+            compacted = Checkpoint(path)
+            self.assertEqual(compacted.results('units')[3], b'y')
+            self.assertRaises(ValueError, compacted.check, 'another search')
+
+    def test_gridsearcher_models(self):
+        validator_kwargs = {
+            'folds': 5,
+            'scorer_cls': DiscretePerfStats,
+            'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+            'seed': 3,
+        }
+        xgser = GridSearcher(
+            Budgeted,
+            CrossValidator,
+            gridsearch_kwargs={ 'c': range(5) },
+            validator_kwargs=validator_kwargs,
+            learn_func=Budgeted.train,
+            keep_models=True
+        )
+        # the extra comes from the models of the best combination, which are never refit
+        Budgeted.budgets = []
+        best = xgser.gridsearch(self.x, self.y, extra='get_c', parallel=False)
+        self.assertEqual(len(Budgeted.budgets), 5 * 5)
+        self.assertEqual(best.kwargs['c'], 1)
+        self.assertEqual(best.extra, [1] * 5)
+        self.assertEqual(len(best.models), 5)
+        # an ensemble of those models predicts in the stead of a refit classifier
+        xgser.final = 'ensemble'
+        Budgeted.budgets = []
+        xgser.learn(self.x, self.y)
+        self.assertEqual(len(Budgeted.budgets), 5 * 5)
+        self.assertEqual(list(xgser.predict(self.x[:2])), [1., 1.])
+        self.assertRaises(ValueError, GridSearcher, Budgeted, CrossValidator, gridsearch_kwargs={ 'c': range(5) }, final='bagging')
+
+    def test_gridsearcher_managerpool(self):
+        with ManagerPool(('127.0.0.1', 0), processes=2) as pool:
+            server = multiprocessing.get_context('spawn').Process(target=serve, args=(pool.address, pool.authkey, 2, 1, 30))
+            server.start()
+            xgser = GridSearcher(
+                Optimist,
+                CrossValidator,
+                gridsearch_kwargs={ 'c': range(5) },
+                validator_kwargs={
+                    'folds': 10,
+                    'scorer_cls': DiscretePerfStats,
+                    'scorer_kwargs': { 'optstat': DiscretePerfStats.ACCURACY },
+                },
+                learn_func=Optimist.train,
+                pool=pool
+            )
+            best = xgser.gridsearch(self.x, self.y)
+        server.join(30)
+        self.assertEqual(best.kwargs['c'], 1)
+
 
 if __name__ == '__main__':
     unittest.main()
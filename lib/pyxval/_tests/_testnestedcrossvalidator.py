@@ -32,14 +32,14 @@ Created on 10/1/11
 
 __author__ = 'Lance Hepler'
 
-import random
+import os, random, tempfile
 import unittest
 
 import numpy as np
 
 from pyxval import CrossValidator, DiscretePerfStats, NestedCrossValidator
 
-from ._optimist import Optimist
+from ._optimist import Fused, Incremental, Optimist
 
 
 __all__ = ['TestNestedCrossValidator']
@@ -88,6 +88,61 @@ class TestNestedCrossValidator(unittest.TestCase):
         rv = nxvalor.validate(self.x, self.y)
         self.assertEquals(rv.stats.get(DiscretePerfStats.ACCURACY).mu, self.accuracy)
 
+    def test_nestedcrossvalidator_gridsearch_results(self):
+        nxvalor = NestedCrossValidator(
+                Optimist,
+                self.folds,
+                self.gridsearch_kwargs,
+                validator_cls=CrossValidator,
+                validator_kwargs=self.validator_kwargs,
+                learn_func=Optimist.train
+        )
+
+        rv = nxvalor.validate(self.x, self.y)
+        self.assertEqual(len(rv.learn), self.folds)
+        # always predicting 1 is the unique best on every outer fold
+        self.assertTrue(all(l.gridsearch.kwargs['c'] == 1 for l in rv.learn))
+
+    def test_nestedcrossvalidator_resume(self):
+        # without a seed, only the checkpoint knows the partitions
+        nxvalor = NestedCrossValidator(
+                Fused,
+                self.folds,
+                self.gridsearch_kwargs,
+                validator_cls=CrossValidator,
+                validator_kwargs=self.validator_kwargs,
+                learn_func=Fused.train
+        )
+        tasks = self.folds * len(self.gridsearch_kwargs['c']) * (self.folds - 1) + self.folds
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'nested.ckpt')
+            Fused.fuse, Fused.predictions = 100, 0
+            self.assertRaises(RuntimeError, nxvalor.validate, self.x, self.y, parallel=False, resume=path)
+            Fused.fuse, Fused.predictions = None, 0
+            rv = nxvalor.validate(self.x, self.y, parallel=False, resume=path)
+            self.assertEqual(Fused.predictions, tasks - 100)
+            Fused.predictions = 0
+            again = nxvalor.validate(self.x, self.y, parallel=False, resume=path)
+            self.assertEqual(Fused.predictions, 0)
+            self.assertEqual(list(again.stats.get(DiscretePerfStats.ACCURACY)), list(rv.stats.get(DiscretePerfStats.ACCURACY)))
+            self.assertEqual([l.gridsearch.kwargs for l in again.learn], [l.gridsearch.kwargs for l in rv.learn])
+
+    def test_nestedcrossvalidator_incremental(self):
+        # the inner validations are trees of updates, like those of a GridSearcher, and the
+        # ensemble of their models predicts, so nothing ever calls learn()
+        nxvalor = NestedCrossValidator(
+                Incremental,
+                5,
+                {},
+                validator_kwargs={ 'folds': 4 },
+                update_func='update',
+                final='ensemble'
+        )
+        rv = nxvalor.validate(self.x, self.y, parallel=False)
+        self.assertEqual(len(rv.stats.get(DiscretePerfStats.ACCURACY)), 5)
+        nxvalor = NestedCrossValidator(Incremental, 5, {}, validator_kwargs={ 'folds': 4 }, final='ensemble')
+        self.assertRaises(RuntimeError, nxvalor.validate, self.x, self.y, parallel=False)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -32,6 +32,9 @@ Created on 10/1/11
 
 __author__ = 'Lance Hepler'
 
+import os
+import shutil
+import tempfile
 import unittest
 
 try:
@@ -39,7 +42,16 @@ try:
 except ImportError:
     import pickle
 
-from pyxval import CrossValidator, DiscretePerfStats, GridSearcher, NestedCrossValidator
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+from pyxval import CrossValidator, DiscretePerfStats, GridSearcher, NestedCrossValidator, NormalValue
+from pyxval._partition import partition
+from pyxval._shareddata import _advice, attach, fingerprint, gather, mapped, release, share
 
 from ._optimist import Optimist
 
@@ -104,6 +116,86 @@ class TestPickling(unittest.TestCase):
         except pickle.PicklingError:
             self.skipTest('PicklingError expected')
 
+    def test_pickle_normalvalue(self):
+        nv = NormalValue(float, [0.5, 1.0], name='accuracy')
+        nv2 = pickle.loads(pickle.dumps(nv))
+        self.assertEqual(nv2, nv)
+        self.assertEqual(nv2.name, 'accuracy')
+
+    def test_pickle_sharedarray(self):
+        x = np.random.rand(1000, 10)
+        sx = share(x)
+        try:
+            data = pickle.dumps(sx)
+            self.assertTrue(len(data) < 1000)
+            self.assertTrue(np.array_equal(attach(pickle.loads(data)), x))
+        finally:
+            release(sx)
+
+    @unittest.skipIf(sparse is None, 'scipy is not installed')
+    def test_pickle_sharedsparse(self):
+        x = sparse.random(1000, 10000, density=0.001, format='csr')
+        sx = share(x)
+        try:
+            data = pickle.dumps(sx)
+            self.assertTrue(len(data) < 1000)
+            x2 = attach(pickle.loads(data))
+            self.assertTrue(sparse.issparse(x2))
+            self.assertEqual((x2 != x).nnz, 0)
+        finally:
+            release(sx)
+
+    def test_pickle_mappedarray(self):
+        x = np.random.rand(1000, 10)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'x.npy')
+            np.save(path, x)
+            mx = share(mapped(path))
+            data = pickle.dumps(mx)
+            self.assertTrue(len(data) < 1000)
+            index = np.array([999, 3, 4, 500, 0])
+            self.assertTrue(np.array_equal(gather(attach(pickle.loads(data)), index, block=16), x[index]))
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_gather_advice(self):
+        page = 4096
+        # rows of two pages, of which a fold wants scattered, unsorted ones: only their pages are advised
+        rows = partition(1000, 10, seed=1).inpart(3)
+        advice = _advice(rows, 0, 2 * page, page)
+        self.assertEqual(sum(length for _, length in advice), len(rows) * 2 * page)
+        self.assertTrue(all(offset % page == 0 for offset, _ in advice))
+        # a contiguous block is a single range
+        self.assertEqual(_advice(np.arange(100, 300)[::-1], 0, 100, page), [(2 * page, 6 * page)])
+        # and rows too sparse for advice to pay get none
+        self.assertEqual(_advice(np.arange(0, 100000, 1000), 0, 100, page), [])
+
+    def test_sharedarray_cache(self):
+        x = np.random.rand(1000, 10)
+        sx, sx2 = share(x), share(x.copy())
+        try:
+            _, (key, path) = sx.__reduce__()
+            _, (key2, path2) = sx2.__reduce__()
+            # the same data is only ever published once
+            self.assertEqual((key, path), (key2, path2))
+            self.assertEqual(key, fingerprint(x))
+        finally:
+            release(sx, sx2)
+        self.assertTrue(os.path.exists(path))
+        budget = os.environ.get('PYXVAL_CACHE_BYTES')
+        os.environ['PYXVAL_CACHE_BYTES'] = '0'
+        try:
+            sx = share(x + 1)
+            pickle.dumps(sx)
+            release(sx)
+            self.assertFalse(os.path.exists(path))
+        finally:
+            if budget is None:
+                del os.environ['PYXVAL_CACHE_BYTES']
+            else:
+                os.environ['PYXVAL_CACHE_BYTES'] = budget
+
 
 if __name__ == '__main__':
     unittest.main()
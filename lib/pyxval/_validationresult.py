@@ -25,12 +25,18 @@ from __future__ import division, print_function
 
 class ValidationResult(object):
 
-    def __init__(self, learn, stats, extra, kwargs={}, gridsearch=None):
+    def __init__(self, learn, stats, extra, kwargs={}, gridsearch=None, error=None, models=None):
         self.learn = learn
         self.stats = stats
         self.extra = extra
         self.kwargs = kwargs
         self.gridsearch = gridsearch
+        self.error = error
+        self.models = models
+
+    @property
+    def failed(self):
+        return self.error is not None
 
     def __repr__(self):
         return str({
@@ -38,7 +44,8 @@ class ValidationResult(object):
             'stats': self.stats,
             'extra': self.extra,
             'kwargs': self.kwargs,
-            'gridsearch': self.gridsearch
+            'gridsearch': self.gridsearch,
+            'error': self.error
         })
 
     def __eq__(self, other):